@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit, parse_qsl
+from business.fachada import Fachada
+from dao.dao_factory import DAOFactory
+from util.exceptions import LoginInvalido, SenhaInvalida, SessaoInvalida, AcessoNegado
+
+class ErroHTTP(Exception):
+    """Erro que vira diretamente uma resposta HTTP"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def livro_para_json(livro):
+    return {"codigo": livro.codigo, "titulo": livro.titulo, "autor": livro.autor, "ano": livro.ano,
+            "quantidade": livro.quantidade, "disponivel": livro.disponivel}
+
+def emprestimo_para_json(emprestimo):
+    data_real = emprestimo.data_devolucao_real
+    return {"codigo": emprestimo.codigo, "login_usuario": emprestimo.login_usuario,
+            "codigo_livro": emprestimo.codigo_livro, "status": emprestimo.status,
+            "data_emprestimo": emprestimo.data_emprestimo.isoformat(),
+            "data_devolucao_prevista": emprestimo.data_devolucao_prevista.isoformat(),
+            "data_devolucao_real": data_real.isoformat() if data_real else None}
+
+
+class ServidorAPI:
+    """Expõe as operações da Fachada como JSON sobre HTTP local.
+
+    O laço de eventos só cuida das conexões; as chamadas à Fachada, que fazem
+    I/O bloqueante nos DAOs, rodam em um pool de threads de tamanho fixo. Um
+    semáforo limita as chamadas em andamento para que a fila do pool não cresça
+    sem limite quando há muitos clientes. Uma requisição que não chega inteira em
+    `tempo_limite_leitura` segundos (inclusive numa conexão keep-alive parada)
+    recebe 408 e a conexão é fechada.
+    """
+
+    STATUS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+              405: "Method Not Allowed", 408: "Request Timeout", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+    TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+    def __init__(self, fachada, host="127.0.0.1", porta=8080, max_threads=32, tempo_limite_leitura=30):
+        self._fachada = fachada
+        self._host = host
+        self._porta = porta
+        self._tempo_limite_leitura = tempo_limite_leitura
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="api")
+        self._limite = asyncio.Semaphore(max_threads * 4)
+        self._servidor = None
+        # (método, primeiro segmento do caminho, quantidade de segmentos) -> tratador
+        self._rotas = {
+            ("POST", "login", 1): self._login,
+            ("POST", "logout", 1): self._logout,
+            ("GET", "livros", 1): self._pesquisar_livros,
+            ("GET", "livros", 2): self._buscar_livro,
+            ("POST", "emprestimos", 1): self._realizar_emprestimo,
+            ("GET", "emprestimos", 2): self._buscar_emprestimo,
+            ("POST", "emprestimos", 2): self._operacao_lote,
+            ("POST", "emprestimos", 3): self._devolver_livro,
+            ("GET", "relatorios", 2): self._gerar_relatorio,
+            ("GET", "metricas", 1): self._metricas,
+        }
+
+    @property
+    def porta(self):
+        return self._porta
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self._host, self._porta)
+        # Com porta 0 o sistema escolhe uma porta livre
+        self._porta = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def servir_para_sempre(self):
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def encerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    async def _executar(self, funcao, *args):
+        """Roda uma chamada bloqueante da Fachada no pool de threads"""
+        async with self._limite:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(funcao, *args))
+
+    # Protocolo HTTP
+    async def _atender(self, leitor, escritor):
+        try:
+            while True:
+                try:
+                    # Prazo para a requisição inteira: um cliente lento não prende a conexão enviando aos poucos
+                    requisicao = await asyncio.wait_for(self._ler_requisicao(leitor), self._tempo_limite_leitura)
+                except asyncio.TimeoutError:
+                    raise ErroHTTP(408, "Tempo esgotado aguardando a requisição")
+                if requisicao is None:
+                    break
+                metodo, caminho, cabecalhos, corpo = requisicao
+                status, resposta = await self._despachar(metodo, caminho, cabecalhos, corpo)
+                manter_conexao = cabecalhos.get("connection", "").lower() != "close"
+                self._escrever_resposta(escritor, status, resposta, manter_conexao)
+                await escritor.drain()
+                if not manter_conexao:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ErroHTTP as e:
+            self._escrever_resposta(escritor, e.status, {"erro": str(e)}, False)
+        finally:
+            escritor.close()
+
+    async def _ler_requisicao(self, leitor):
+        linha = await leitor.readline()
+        if not linha:
+            return None
+        try:
+            metodo, caminho, _ = linha.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ErroHTTP(400, "Linha de requisição inválida")
+
+        cabecalhos = {}
+        while True:
+            linha = await leitor.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        try:
+            tamanho = int(cabecalhos.get("content-length", 0) or 0)
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho < 0:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho > self.TAMANHO_MAXIMO_CORPO:
+            raise ErroHTTP(413, "Corpo da requisição muito grande")
+        corpo = await leitor.readexactly(tamanho) if tamanho else b""
+        return metodo.upper(), caminho, cabecalhos, corpo
+
+    def _escrever_resposta(self, escritor, status, resposta, manter_conexao):
+        # Texto vai como text/plain (exposição do Prometheus); o resto, como JSON
+        if isinstance(resposta, str):
+            corpo, tipo = resposta.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            corpo, tipo = json.dumps(resposta, ensure_ascii=False).encode("utf-8"), "application/json"
+        cabecalho = (f"HTTP/1.1 {status} {self.STATUS.get(status, '')}\r\n"
+                     f"Content-Type: {tipo}; charset=utf-8\r\n"
+                     f"Content-Length: {len(corpo)}\r\n"
+                     f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n")
+        escritor.write(cabecalho.encode("latin-1") + corpo)
+
+    async def _despachar(self, metodo, caminho, cabecalhos, corpo):
+        url = urlsplit(caminho)
+        segmentos = [s for s in url.path.split("/") if s]
+        parametros = dict(parse_qsl(url.query))
+        tratador = self._rotas.get((metodo, segmentos[0] if segmentos else "", len(segmentos)))
+        if tratador is None:
+            return 404, {"erro": "Rota não encontrada"}
+
+        try:
+            dados = json.loads(corpo) if corpo else {}
+            if not isinstance(dados, dict):
+                raise ErroHTTP(400, "O corpo deve ser um objeto JSON")
+            return await tratador(segmentos, parametros, dados, self._token(cabecalhos))
+        except json.JSONDecodeError:
+            return 400, {"erro": "JSON inválido"}
+        except ErroHTTP as e:
+            return e.status, {"erro": str(e)}
+        except SessaoInvalida as e:
+            return 401, {"erro": str(e)}
+        except AcessoNegado as e:
+            return 403, {"erro": str(e)}
+        except (ValueError, KeyError, TypeError, LoginInvalido, SenhaInvalida) as e:
+            return 400, {"erro": str(e)}
+        except Exception as e:
+            return 500, {"erro": f"Erro interno: {e}"}
+
+    @staticmethod
+    def _token(cabecalhos):
+        # "Authorization: Bearer <token>", com o token recebido em POST /login
+        tipo, _, token = cabecalhos.get("authorization", "").partition(" ")
+        return token.strip() if tipo.lower() == "bearer" and token.strip() else None
+
+    @staticmethod
+    def _codigos(dados, campo):
+        codigos = dados[campo]
+        if not isinstance(codigos, list) or not all(isinstance(codigo, str) for codigo in codigos):
+            raise ErroHTTP(400, f"'{campo}' deve ser uma lista de códigos")
+        return codigos
+
+    @staticmethod
+    def _exigir_token(token):
+        if token is None:
+            raise ErroHTTP(401, "Informe o token da sessão no cabeçalho Authorization")
+        return token
+
+    # Rotas
+    async def _login(self, segmentos, parametros, dados, token):
+        sessao = await self._executar(self._fachada.iniciar_sessao, dados["login"], dados["senha"])
+        if not sessao:
+            raise ErroHTTP(401, "Login ou senha incorretos")
+        return 200, {"token": sessao.token, "login": sessao.login, "admin": sessao.admin}
+
+    async def _logout(self, segmentos, parametros, dados, token):
+        # Só mexe na tabela em memória: não precisa do pool de threads
+        self._fachada.encerrar_sessao(self._exigir_token(token))
+        return 200, {"encerrada": True}
+
+    async def _pesquisar_livros(self, segmentos, parametros, dados, token):
+        limite = int(parametros.get("limite", 20))
+        if "q" in parametros:
+            livros = await self._executar(self._fachada.pesquisar_livros, parametros["q"], limite)
+        elif parametros.get("disponiveis") == "1":
+            livros = await self._executar(self._fachada.buscar_livros_disponiveis,
+                                          int(parametros.get("offset", 0)), limite)
+        else:
+            livros = await self._executar(self._fachada.buscar_pagina_livros,
+                                          int(parametros.get("offset", 0)), limite, parametros.get("ordem"))
+        return 200, [livro_para_json(livro) for livro in livros]
+
+    async def _buscar_livro(self, segmentos, parametros, dados, token):
+        livro = await self._executar(self._fachada.buscar_livro, segmentos[1])
+        if not livro:
+            raise ErroHTTP(404, "Livro não encontrado")
+        return 200, livro_para_json(livro)
+
+    async def _realizar_emprestimo(self, segmentos, parametros, dados, token):
+        # Sem "codigo" no corpo o código é gerado pelo servidor
+        emprestimo = await self._executar(self._fachada.realizar_emprestimo, dados.get("codigo"),
+                                          dados["login_usuario"], dados["codigo_livro"], self._exigir_token(token))
+        return 201, emprestimo_para_json(emprestimo)
+
+    async def _buscar_emprestimo(self, segmentos, parametros, dados, token):
+        emprestimo = await self._executar(self._fachada.buscar_emprestimo, segmentos[1], self._exigir_token(token))
+        if not emprestimo:
+            raise ErroHTTP(404, "Empréstimo não encontrado")
+        return 200, emprestimo_para_json(emprestimo)
+
+    async def _devolver_livro(self, segmentos, parametros, dados, token):
+        if segmentos[2] != "devolucao":
+            raise ErroHTTP(404, "Rota não encontrada")
+        emprestimo = await self._executar(self._fachada.devolver_livro, segmentos[1], self._exigir_token(token))
+        return 200, emprestimo_para_json(emprestimo)
+
+    async def _operacao_lote(self, segmentos, parametros, dados, token):
+        if segmentos[1] == "lote":
+            resultado = await self._executar(self._fachada.realizar_emprestimos_lote, dados["login_usuario"],
+                                             self._codigos(dados, "codigos_livros"), self._exigir_token(token))
+        elif segmentos[1] == "devolucoes":
+            resultado = await self._executar(self._fachada.devolver_lote, self._codigos(dados, "codigos"),
+                                             self._exigir_token(token))
+        else:
+            raise ErroHTTP(404, "Rota não encontrada")
+        return 200, {"sucessos": [emprestimo_para_json(e) for e in resultado.sucessos],
+                     "falhas": [{"codigo": codigo, "erro": mensagem} for codigo, mensagem in resultado.falhas]}
+
+    async def _gerar_relatorio(self, segmentos, parametros, dados, token):
+        if segmentos[1] == "acessos":
+            top_n = int(parametros["top_n"]) if "top_n" in parametros else None
+            relatorio = await self._executar(self._fachada.gerar_relatorio_acessos, top_n, self._exigir_token(token))
+        elif segmentos[1] == "emprestimos":
+            relatorio = await self._executar(self._fachada.gerar_relatorio_emprestimos, self._exigir_token(token))
+        else:
+            raise ErroHTTP(404, "Relatório não encontrado")
+        return 200, {"relatorio": relatorio}
+
+    async def _metricas(self, segmentos, parametros, dados, token):
+        if parametros.get("formato") == "json":
+            return 200, self._fachada.metricas()
+        return 200, self._fachada.exportar_metricas_prometheus()
+
+
+async def _servir(fachada, host, porta, max_threads, tempo_limite_leitura):
+    servidor = await ServidorAPI(fachada, host, porta, max_threads, tempo_limite_leitura).iniciar()
+    print(f"Servidor da biblioteca em http://{host}:{servidor.porta}")
+    try:
+        await servidor.servir_para_sempre()
+    finally:
+        await servidor.encerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP/JSON do sistema de biblioteca")
+    parser.add_argument("--armazenamento", default="arquivo", choices=["memoria", "arquivo", "journal", "mmap", "sqlite"])
+    parser.add_argument("--cache", choices=["write-through", "write-back", "group-commit"],
+                        help="cache em memória para o armazenamento em arquivo")
+    parser.add_argument("--janela-ms", type=float, default=5, help="janela da gravação em grupo")
+    parser.add_argument("--sem-aguardar-gravacao", action="store_true",
+                        help="na gravação em grupo, responde sem esperar a gravação no arquivo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--tempo-limite-leitura", type=float, default=30,
+                        help="segundos para receber cada requisição; depois disso responde 408 e fecha a conexão")
+    parser.add_argument("--auditoria", help="arquivo JSON Lines onde todas as operações são registradas")
+    args = parser.parse_args()
+
+    dao_factory = DAOFactory.get_factory(args.armazenamento, args.cache, args.janela_ms, not args.sem_aguardar_gravacao)
+    fachada = Fachada.get_instance(dao_factory, arquivo_auditoria=args.auditoria)
+    if not fachada.buscar_usuario("admin"):
+        fachada.cadastrar_usuario("admin", "Admin123!", True)
+
+    try:
+        asyncio.run(_servir(fachada, args.host, args.porta, args.threads, args.tempo_limite_leitura))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
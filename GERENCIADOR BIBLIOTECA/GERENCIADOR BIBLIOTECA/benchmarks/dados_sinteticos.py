@@ -0,0 +1,48 @@
+import random
+from string import ascii_lowercase
+
+SENHA = "Senha123!"
+PALAVRAS = ["casa", "mar", "noite", "sertão", "cidade", "memórias", "vidas", "tempo", "vento", "rio", "sol",
+            "menino", "engenho", "capitães", "areia", "estrela", "hora", "grande", "secas", "terra"]
+AUTORES = ["Machado de Assis", "Clarice Lispector", "Jorge Amado", "Graciliano Ramos", "Rachel de Queiroz",
+           "José Lins do Rego", "Guimarães Rosa", "Cecília Meireles", "Carlos Drummond", "Lima Barreto"]
+
+def login(numero):
+    """Login só com letras (regra de GerenciadorUsuarios) derivado de um número"""
+    letras = ""
+    while True:
+        numero, resto = divmod(numero, 26)
+        letras = ascii_lowercase[resto] + letras
+        if numero == 0:
+            return "u" + letras
+
+def codigo_livro(numero):
+    return f"L{numero:07d}"
+
+def gerar(fachada, usuarios=200, livros=2000, emprestimos=1000, semente=42):
+    """Popula a biblioteca pela Fachada; metade dos empréstimos é devolvida.
+
+    Retorna (logins, códigos de livro, códigos dos empréstimos ativos).
+    """
+    aleatorio = random.Random(semente)
+    logins = [login(i) for i in range(usuarios)]
+    codigos = [codigo_livro(i) for i in range(livros)]
+
+    fachada.importar_usuarios({"login": l, "senha": SENHA, "admin": False} for l in logins)
+    fachada.importar_livros({"codigo": codigo,
+                             "titulo": f"{aleatorio.choice(PALAVRAS)} {aleatorio.choice(PALAVRAS)} {i}",
+                             "autor": aleatorio.choice(AUTORES),
+                             "ano": aleatorio.randint(1900, 2024),
+                             "quantidade": aleatorio.randint(2, 6)} for i, codigo in enumerate(codigos))
+
+    ativos = []
+    restantes = emprestimos
+    while restantes > 0:
+        quantidade = min(5, restantes)
+        resultado = fachada.realizar_emprestimos_lote(aleatorio.choice(logins), aleatorio.sample(codigos, quantidade))
+        ativos.extend(emprestimo.codigo for emprestimo in resultado.sucessos)
+        restantes -= quantidade
+
+    devolvidos = set(aleatorio.sample(ativos, len(ativos) // 2))
+    fachada.devolver_lote(list(devolvidos))
+    return logins, codigos, [codigo for codigo in ativos if codigo not in devolvidos]
\ No newline at end of file
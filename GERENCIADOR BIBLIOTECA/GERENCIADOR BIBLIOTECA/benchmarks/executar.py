@@ -0,0 +1,151 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from benchmarks import dados_sinteticos, serializacao
+
+# "tipo:cache" escolhe também o modo de cache (só para arquivo)
+BACKENDS = ["memoria", "arquivo", "arquivo:group-commit", "journal", "mmap", "sqlite"]
+
+def resumir(latencias, duracao):
+    """Percentis de latência (ms) e vazão (operações/s) de uma série de medições"""
+    ordenadas = sorted(latencias)
+
+    def percentil(p):
+        return round(ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] * 1000, 3)
+
+    return {"operacoes": len(ordenadas),
+            "p50_ms": percentil(50), "p90_ms": percentil(90), "p99_ms": percentil(99),
+            "max_ms": round(ordenadas[-1] * 1000, 3),
+            "media_ms": round(sum(ordenadas) / len(ordenadas) * 1000, 3),
+            "ops_por_s": round(len(ordenadas) / duracao, 1) if duracao else None}
+
+def cronometrar(funcao, chamadas):
+    """Executa funcao(*args) para cada args de `chamadas`, medindo cada chamada"""
+    latencias = []
+    inicio = time.perf_counter()
+    for args in chamadas:
+        antes = time.perf_counter()
+        funcao(*args)
+        latencias.append(time.perf_counter() - antes)
+    return resumir(latencias, time.perf_counter() - inicio)
+
+def concorrencia(fachada, threads=16, tentativas=400):
+    """Várias threads disputam os exemplares de um mesmo livro; confere que nenhum é emprestado a mais"""
+    quantidade = tentativas // 2
+    fachada.cadastrar_livro("CONCORRIDO", "Livro concorrido", "Autor", 2000, quantidade)
+    login = dados_sinteticos.login(0)
+    sucessos = []
+    trava = threading.Lock()
+    latencias = []
+
+    def tentar(_):
+        antes = time.perf_counter()
+        try:
+            emprestimo = fachada.realizar_emprestimo(None, login, "CONCORRIDO")
+        except ValueError:
+            emprestimo = None
+        with trava:
+            latencias.append(time.perf_counter() - antes)
+            if emprestimo:
+                sucessos.append(emprestimo.codigo)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(tentar, range(tentativas)))
+    resultado = resumir(latencias, time.perf_counter() - inicio)
+
+    livro = fachada.buscar_livro("CONCORRIDO")
+    resultado["threads"] = threads
+    resultado["consistente"] = (len(sucessos) == quantidade and livro.disponivel == 0
+                                and len(set(sucessos)) == len(sucessos))
+    return resultado
+
+def executar_backend(backend, diretorio, usuarios, livros, emprestimos, operacoes, semente):
+    """Mede um backend dentro de `diretorio` (roda em processo separado)"""
+    from business.fachada import Fachada
+    from dao.dao_factory import DAOFactory
+
+    # O processo permanece no diretório até o fim, para que os atexit dos DAOs gravem nele
+    os.chdir(diretorio)
+    tipo, _, cache = backend.partition(":")
+    fachada = Fachada.get_instance(DAOFactory.get_factory(tipo, cache or None))
+    aleatorio = random.Random(semente)
+
+    inicio = time.perf_counter()
+    logins, codigos, ativos = dados_sinteticos.gerar(fachada, usuarios, livros, emprestimos, semente)
+    resultados = {"carga_s": round(time.perf_counter() - inicio, 3)}
+
+    resultados["autenticar_usuario"] = cronometrar(
+        fachada.autenticar_usuario, [(aleatorio.choice(logins), dados_sinteticos.SENHA) for _ in range(operacoes)])
+    tokens = [fachada.iniciar_sessao(login, dados_sinteticos.SENHA).token for login in logins[:20]]
+    resultados["resolver_sessao"] = cronometrar(fachada.sessao, [(aleatorio.choice(tokens),) for _ in range(operacoes)])
+    resultados["pesquisar_livros"] = cronometrar(
+        fachada.pesquisar_livros, [(aleatorio.choice(dados_sinteticos.PALAVRAS),) for _ in range(operacoes)])
+    resultados["buscar_emprestimos_usuario"] = cronometrar(
+        fachada.buscar_emprestimos_usuario, [(aleatorio.choice(logins),) for _ in range(operacoes)])
+
+    novos = []
+    def realizar(login, codigo):
+        try:
+            novos.append(fachada.realizar_emprestimo(None, login, codigo).codigo)
+        except ValueError:
+            pass  # livro sem exemplares: a tentativa também conta como operação
+    resultados["realizar_emprestimo"] = cronometrar(
+        realizar, [(aleatorio.choice(logins), aleatorio.choice(codigos)) for _ in range(operacoes)])
+    resultados["devolver_livro"] = cronometrar(fachada.devolver_livro, [(codigo,) for codigo in novos])
+
+    repeticoes = max(1, operacoes // 20)
+    resultados["gerar_relatorio_acessos"] = cronometrar(fachada.gerar_relatorio_acessos, [(10,)] * repeticoes)
+    resultados["gerar_relatorio_emprestimos"] = cronometrar(fachada.gerar_relatorio_emprestimos, [()] * repeticoes)
+    resultados["concorrencia"] = concorrencia(fachada)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos fluxos da Fachada em cada backend de DAO")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="lista separada por vírgulas")
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--livros", type=int, default=2000)
+    parser.add_argument("--emprestimos", type=int, default=1000)
+    parser.add_argument("--operacoes", type=int, default=200, help="medições por operação")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--serializacao", type=int, default=0, help="objetos no benchmark de serialização (0 = não roda)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: imprime na tela)")
+    args = parser.parse_args()
+
+    relatorio = {
+        "parametros": {"usuarios": args.usuarios, "livros": args.livros, "emprestimos": args.emprestimos,
+                       "operacoes": args.operacoes, "semente": args.semente},
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "backends": {},
+    }
+    # Um processo novo por backend: o singleton da Fachada, os arquivos e os atexit dos DAOs não se misturam
+    contexto = multiprocessing.get_context("spawn")
+    for backend in args.backends.split(","):
+        diretorio = tempfile.mkdtemp(prefix=f"sgb-{backend.replace(':', '-')}-")
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                relatorio["backends"][backend] = executor.submit(
+                    executar_backend, backend, diretorio, args.usuarios, args.livros, args.emprestimos,
+                    args.operacoes, args.semente).result()
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+    if args.serializacao:
+        relatorio["serializacao"] = serializacao.executar(args.serializacao)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import argparse
+import json
+import pickle
+import time
+import tracemalloc
+from datetime import datetime
+from models.emprestimo import Emprestimo
+from models.livro import Livro
+from models.usuario import Usuario
+
+# Equivalentes dos modelos no formato anterior (objetos com __dict__, serializados por inteiro)
+class LivroDict:
+    def __init__(self, codigo, titulo, autor, ano, quantidade):
+        self._codigo = codigo
+        self._titulo = titulo
+        self._autor = autor
+        self._ano = ano
+        self._quantidade = quantidade
+        self._disponivel = quantidade
+
+class UsuarioDict:
+    def __init__(self, login, senha, admin=False):
+        self._login = login
+        self._senha = senha
+        self._admin = admin
+        self._acessos = 0
+
+class EmprestimoDict:
+    def __init__(self, codigo, login_usuario, codigo_livro, data):
+        self._codigo = codigo
+        self._login_usuario = login_usuario
+        self._codigo_livro = codigo_livro
+        self._data_emprestimo = data
+        self._data_devolucao_prevista = data
+        self._data_devolucao_real = None
+        self._status = "Ativo"
+
+
+def _criar(tipo, n, compacto):
+    data = datetime(2024, 1, 1)
+    if tipo == "livros":
+        classe = Livro if compacto else LivroDict
+        return {f"L{i}": classe(f"L{i}", f"Titulo {i}", f"Autor {i % 500}", 2000, 3) for i in range(n)}
+    if tipo == "usuarios":
+        classe = Usuario if compacto else UsuarioDict
+        return {f"u{i}": classe(f"u{i}", "Senha123!", False) for i in range(n)}
+    if compacto:
+        return {f"E{i}": Emprestimo.de_referencias(f"E{i}", f"u{i % 1000}", f"L{i % 5000}", data, data, None, "Ativo")
+                for i in range(n)}
+    return {f"E{i}": EmprestimoDict(f"E{i}", f"u{i % 1000}", f"L{i % 5000}", data) for i in range(n)}
+
+def medir(tipo, n, compacto):
+    tracemalloc.start()
+    dados = _criar(tipo, n, compacto)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    serializado = pickle.dumps(dados)
+    codificar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    pickle.loads(serializado)
+    decodificar = time.perf_counter() - inicio
+
+    return {"bytes_por_objeto_memoria": round(memoria / n, 1),
+            "bytes_por_objeto_arquivo": round(len(serializado) / n, 1),
+            "codificar_s": round(codificar, 4),
+            "decodificar_s": round(decodificar, 4)}
+
+def executar(n=100000):
+    resultados = {}
+    for tipo in ("livros", "usuarios", "emprestimos"):
+        resultados[tipo] = {"dict": medir(tipo, n, False), "slots": medir(tipo, n, True)}
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara memória, tamanho e tempo de serialização dos modelos")
+    parser.add_argument("-n", type=int, default=100000, help="objetos por tipo")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: imprime na tela)")
+    args = parser.parse_args()
+
+    resultados = {"n": args.n, "resultados": executar(args.n)}
+    texto = json.dumps(resultados, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
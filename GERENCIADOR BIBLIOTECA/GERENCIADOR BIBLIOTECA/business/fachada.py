@@ -1,133 +1,336 @@
+import threading
 from business.gerenciador_usuarios import GerenciadorUsuarios
 from business.gerenciador_livros import GerenciadorLivros
-from business.gerenciador_emprestimos import GerenciadorEmprestimos
+from business.gerenciador_emprestimos import GerenciadorEmprestimos, ResultadoLote
+from business.relatorios.estatisticas_emprestimos import EstatisticasEmprestimos
+from business.gerador_codigos import GeradorCodigos
+from business.gerenciador_sessoes import GerenciadorSessoes
+from business import importador
 from util.comando import Comando, Invoker
+from util.exceptions import AcessoNegado
+from util.metricas import RegistroMetricas
+from util.travas import TravasPorChave
 
 # Singleton e Facade
 class Fachada:
     _instance = None
+    _trava_instancia = threading.Lock()
     
     @classmethod
-    def get_instance(cls, dao_factory=None):
+    def get_instance(cls, dao_factory=None, limite_historico=1000, arquivo_auditoria=None):
         if cls._instance is None:
-            cls._instance = cls(dao_factory)
+            with cls._trava_instancia:
+                if cls._instance is None:
+                    cls._instance = cls(dao_factory, limite_historico, arquivo_auditoria)
         return cls._instance
     
-    def __init__(self, dao_factory):
+    def __init__(self, dao_factory, limite_historico=1000, arquivo_auditoria=None):
         if self.__class__._instance is not None:
             raise Exception("Esta classe é um Singleton!")
         else:
             self._gerenciador_usuarios = GerenciadorUsuarios(dao_factory.criar_usuario_dao())
             self._gerenciador_livros = GerenciadorLivros(dao_factory.criar_livro_dao())
-            self._gerenciador_emprestimos = GerenciadorEmprestimos(dao_factory.criar_emprestimo_dao())
-            self._invoker = Invoker()
+            # Estatísticas e sequência de códigos compartilham o mesmo DAO de metadados
+            metadados_dao = dao_factory.criar_metadados_dao()
+            self._gerenciador_emprestimos = GerenciadorEmprestimos(dao_factory.criar_emprestimo_dao(),
+                                                                   self._gerenciador_usuarios, self._gerenciador_livros,
+                                                                   EstatisticasEmprestimos(metadados_dao))
+            self._gerador_codigos = GeradorCodigos(metadados_dao)
+            self._metricas = RegistroMetricas()
+            # Só as últimas operações ficam em memória; o histórico completo, se pedido, vai para o arquivo
+            self._invoker = Invoker(self._metricas, limite_historico, arquivo_auditoria)
+            # Operações sobre o mesmo usuário, livro ou empréstimo são serializadas;
+            # as demais rodam em paralelo
+            self._travas = TravasPorChave()
+            self._sessoes = GerenciadorSessoes()
+    
+    # Sessões
+    def iniciar_sessao(self, login, senha):
+        """Autentica e retorna a Sessao com o token a usar nas chamadas seguintes (None se falhar)"""
+        usuario = self.autenticar_usuario(login, senha)
+        return self._sessoes.iniciar(usuario) if usuario else None
+    
+    def encerrar_sessao(self, token):
+        return self._sessoes.encerrar(token)
+    
+    def sessao(self, token):
+        """Usuário e permissões do token; levanta SessaoInvalida se desconhecido ou expirado"""
+        return self._sessoes.resolver(token)
+    
+    def _autorizar(self, token, admin=False, login=None):
+        """Confere a sessão do token: `admin` exige administrador e `login` admite também o próprio usuário.
+        
+        Sem token a chamada vem de quem já autenticou o usuário (ex.: os menus) e não é conferida.
+        """
+        if token is None:
+            return None
+        sessao = self._sessoes.resolver(token)
+        if sessao.admin or (not admin and (login is None or login == sessao.login)):
+            return sessao
+        raise AcessoNegado("Operação não permitida para este usuário")
+    
+    def _autorizar_emprestimos(self, token, codigos):
+        # Quem não é administrador só mexe nos próprios empréstimos
+        sessao = self._autorizar(token)
+        if sessao is not None and not sessao.admin:
+            for emprestimo in self._gerenciador_emprestimos.buscar_varios(codigos).values():
+                if emprestimo.login_usuario != sessao.login:
+                    raise AcessoNegado("Operação não permitida para este usuário")
     
     # Métodos de usuário
-    def cadastrar_usuario(self, login, senha, admin=False):
-        comando = CadastrarUsuarioComando(self._gerenciador_usuarios, login, senha, admin)
+    def cadastrar_usuario(self, login, senha, admin=False, token=None):
+        self._autorizar(token, admin=True)
+        comando = CadastrarUsuarioComando(self._gerenciador_usuarios, self._travas, login, senha, admin)
         return self._invoker.executar(comando)
     
-    def buscar_usuario(self, login):
+    def importar_usuarios(self, linhas, tamanho_lote=1000, token=None):
+        """Importa usuários de um iterável de dicts (login, senha, admin), gravando um lote por vez"""
+        self._autorizar(token, admin=True)
+        def gravar_lote(lote):
+            return self._invoker.executar(ImportarUsuariosComando(self._gerenciador_usuarios, self._travas, lote))
+        return importador.importar(linhas, importador.converter_usuario, gravar_lote, tamanho_lote)
+    
+    def buscar_usuario(self, login, token=None):
+        self._autorizar(token, login=login)
         return self._gerenciador_usuarios.buscar(login)
     
-    def buscar_todos_usuarios(self):
+    def buscar_todos_usuarios(self, token=None):
+        self._autorizar(token, admin=True)
         return self._gerenciador_usuarios.buscar_todos()
     
-    def atualizar_usuario(self, login, senha, admin):
-        comando = AtualizarUsuarioComando(self._gerenciador_usuarios, login, senha, admin)
-        return self._invoker.executar(comando)
+    def buscar_pagina_usuarios(self, offset=0, limite=20, ordem=None, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_usuarios.buscar_pagina(offset, limite, ordem)
     
-    def desfazer_ultima_atualizacao_usuario(self):
-        return self._gerenciador_usuarios.restaurar_memento()
+    def iterar_usuarios(self, tamanho_lote=100, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_usuarios.iterar(tamanho_lote)
     
-    def deletar_usuario(self, login):
-        comando = DeletarUsuarioComando(self._gerenciador_usuarios, login)
-        return self._invoker.executar(comando)
+    # Alterar ou remover um usuário encerra as sessões dele, que guardam as permissões antigas
+    def atualizar_usuario(self, login, senha, admin, token=None):
+        self._autorizar(token, admin=True)
+        comando = AtualizarUsuarioComando(self._gerenciador_usuarios, self._travas, login, senha, admin)
+        usuario = self._invoker.executar(comando)
+        self._sessoes.encerrar_do_usuario(login)
+        return usuario
+    
+    def desfazer_ultima_atualizacao_usuario(self, token=None):
+        self._autorizar(token, admin=True)
+        usuario = self._gerenciador_usuarios.restaurar_memento()
+        self._sessoes.encerrar_do_usuario(usuario.login)
+        return usuario
+    
+    def deletar_usuario(self, login, token=None):
+        self._autorizar(token, admin=True)
+        comando = DeletarUsuarioComando(self._gerenciador_usuarios, self._travas, login)
+        resultado = self._invoker.executar(comando)
+        self._sessoes.encerrar_do_usuario(login)
+        return resultado
     
     def autenticar_usuario(self, login, senha):
-        return self._gerenciador_usuarios.autenticar(login, senha)
+        with self._travas.travar(("usuario", login)):
+            return self._gerenciador_usuarios.autenticar(login, senha)
     
     # Métodos de livro
-    def cadastrar_livro(self, codigo, titulo, autor, ano, quantidade):
-        comando = CadastrarLivroComando(self._gerenciador_livros, codigo, titulo, autor, ano, quantidade)
+    def cadastrar_livro(self, codigo, titulo, autor, ano, quantidade, token=None):
+        self._autorizar(token, admin=True)
+        comando = CadastrarLivroComando(self._gerenciador_livros, self._travas, codigo, titulo, autor, ano, quantidade)
         return self._invoker.executar(comando)
     
+    def importar_livros(self, linhas, tamanho_lote=1000, token=None):
+        """Importa livros de um iterável de dicts (codigo, titulo, autor, ano, quantidade), gravando um lote por vez"""
+        self._autorizar(token, admin=True)
+        def gravar_lote(lote):
+            return self._invoker.executar(ImportarLivrosComando(self._gerenciador_livros, self._travas, lote))
+        return importador.importar(linhas, importador.converter_livro, gravar_lote, tamanho_lote)
+    
     def buscar_livro(self, codigo):
         return self._gerenciador_livros.buscar(codigo)
     
     def buscar_todos_livros(self):
         return self._gerenciador_livros.buscar_todos()
     
-    def atualizar_livro(self, codigo, titulo, autor, ano, quantidade):
-        comando = AtualizarLivroComando(self._gerenciador_livros, codigo, titulo, autor, ano, quantidade)
+    def buscar_pagina_livros(self, offset=0, limite=20, ordem=None):
+        return self._gerenciador_livros.buscar_pagina(offset, limite, ordem)
+    
+    def iterar_livros(self, tamanho_lote=100):
+        return self._gerenciador_livros.iterar(tamanho_lote)
+    
+    def pesquisar_livros(self, consulta, limite=10):
+        return self._gerenciador_livros.pesquisar(consulta, limite)
+    
+    def buscar_livros_disponiveis(self, offset=0, limite=20):
+        return self._gerenciador_livros.buscar_disponiveis(offset, limite)
+    
+    def contar_livros_disponiveis(self):
+        return self._gerenciador_livros.contar_disponiveis()
+    
+    def atualizar_livro(self, codigo, titulo, autor, ano, quantidade, token=None):
+        self._autorizar(token, admin=True)
+        comando = AtualizarLivroComando(self._gerenciador_livros, self._travas, codigo, titulo, autor, ano, quantidade)
         return self._invoker.executar(comando)
     
-    def desfazer_ultima_atualizacao_livro(self):
+    def desfazer_ultima_atualizacao_livro(self, token=None):
+        self._autorizar(token, admin=True)
         return self._gerenciador_livros.restaurar_memento()
     
-    def deletar_livro(self, codigo):
-        comando = DeletarLivroComando(self._gerenciador_livros, codigo)
+    def deletar_livro(self, codigo, token=None):
+        self._autorizar(token, admin=True)
+        comando = DeletarLivroComando(self._gerenciador_livros, self._travas, codigo)
         return self._invoker.executar(comando)
     
     # Métodos de empréstimo
-    def realizar_emprestimo(self, codigo, login_usuario, codigo_livro):
+    def realizar_emprestimo(self, codigo, login_usuario, codigo_livro, token=None):
+        """Realiza um empréstimo; com `codigo` None o código é gerado automaticamente"""
+        self._autorizar(token, login=login_usuario)
+        verificar_codigo = codigo is not None
+        if codigo is None:
+            codigo = self._gerador_codigos.proximo()
+        elif self._gerador_codigos.reservado(codigo):
+            # Códigos gerados não são conferidos: um informado no mesmo formato poderia ser sobrescrito depois
+            raise ValueError(f"Código '{codigo}' é reservado para a geração automática")
         comando = RealizarEmprestimoComando(self._gerenciador_emprestimos, self._gerenciador_usuarios, 
-                                             self._gerenciador_livros, codigo, login_usuario, codigo_livro)
+                                             self._gerenciador_livros, self._travas, codigo, login_usuario, codigo_livro,
+                                             verificar_codigo)
         return self._invoker.executar(comando)
     
-    def devolver_livro(self, codigo_emprestimo):
-        comando = DevolverLivroComando(self._gerenciador_emprestimos, self._gerenciador_livros, codigo_emprestimo)
+    def devolver_livro(self, codigo_emprestimo, token=None):
+        self._autorizar_emprestimos(token, [codigo_emprestimo])
+        comando = DevolverLivroComando(self._gerenciador_emprestimos, self._gerenciador_livros, self._travas, codigo_emprestimo)
         return self._invoker.executar(comando)
     
-    def buscar_emprestimo(self, codigo):
-        return self._gerenciador_emprestimos.buscar(codigo)
+    def realizar_emprestimos_lote(self, login_usuario, codigos_livros, token=None):
+        """Empresta vários livros ao mesmo usuário; retorna um ResultadoLote com os empréstimos e as falhas"""
+        self._autorizar(token, login=login_usuario)
+        itens = list(zip(self._gerador_codigos.proximos(len(codigos_livros)), codigos_livros))
+        comando = RealizarEmprestimosLoteComando(self._gerenciador_emprestimos, self._gerenciador_usuarios,
+                                                 self._gerenciador_livros, self._travas, login_usuario, itens)
+        return self._invoker.executar(comando)
     
-    def buscar_todos_emprestimos(self):
+    def devolver_lote(self, codigos_emprestimo, token=None):
+        """Devolve vários empréstimos; retorna um ResultadoLote com os devolvidos e as falhas"""
+        self._autorizar_emprestimos(token, codigos_emprestimo)
+        comando = DevolverLoteComando(self._gerenciador_emprestimos, self._gerenciador_livros, self._travas,
+                                      codigos_emprestimo)
+        return self._invoker.executar(comando)
+    
+    def buscar_emprestimo(self, codigo, token=None):
+        sessao = self._autorizar(token)
+        emprestimo = self._gerenciador_emprestimos.buscar(codigo)
+        if emprestimo and sessao is not None and not sessao.admin and emprestimo.login_usuario != sessao.login:
+            raise AcessoNegado("Operação não permitida para este usuário")
+        return emprestimo
+    
+    def buscar_todos_emprestimos(self, token=None):
+        self._autorizar(token, admin=True)
         return self._gerenciador_emprestimos.buscar_todos()
     
-    def buscar_emprestimos_usuario(self, login_usuario):
+    def buscar_pagina_emprestimos(self, offset=0, limite=20, ordem=None, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_emprestimos.buscar_pagina(offset, limite, ordem)
+    
+    def iterar_emprestimos(self, tamanho_lote=100, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_emprestimos.iterar(tamanho_lote)
+    
+    def buscar_emprestimos_usuario(self, login_usuario, token=None):
+        self._autorizar(token, login=login_usuario)
         return self._gerenciador_emprestimos.buscar_por_usuario(login_usuario)
     
+    def buscar_emprestimos_livro(self, codigo_livro, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_emprestimos.buscar_por_livro(codigo_livro)
+    
+    def buscar_emprestimos_ativos(self, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_emprestimos.buscar_ativos()
+    
     # Métodos de relatório
-    def gerar_relatorio_acessos(self):
-        return self._gerenciador_usuarios.gerar_relatorio_acessos()
+    def gerar_relatorio_acessos(self, top_n=None, token=None):
+        self._autorizar(token, admin=True)
+        return self._gerenciador_usuarios.gerar_relatorio_acessos(top_n)
     
-    def gerar_relatorio_emprestimos(self):
+    def gerar_relatorio_emprestimos(self, token=None):
+        self._autorizar(token, admin=True)
         return self._gerenciador_emprestimos.gerar_relatorio_emprestimos()
+    
+    def resumir_emprestimos(self, token=None):
+        """Os números do relatório de empréstimos: {"total", "ativos", "devolvidos", "top_usuarios", "top_livros"}"""
+        self._autorizar(token, admin=True)
+        return self._gerenciador_emprestimos.resumir_emprestimos()
+    
+    # Histórico de operações
+    def consultar_historico(self, comando=None, desde=None, ate=None, limite=None, token=None):
+        """Operações executadas, filtradas por tipo de comando (ex.: "RealizarEmprestimoComando") e período"""
+        self._autorizar(token, admin=True)
+        return self._invoker.consultar_historico(comando, desde, ate, limite)
+    
+    # Métricas
+    def metricas(self):
+        """Contadores e histogramas dos comandos executados: {nome: {rótulos: valor}}"""
+        return self._metricas.instantaneo()
+    
+    def exportar_metricas_prometheus(self):
+        return self._metricas.exportar_prometheus()
 
 
 # Implementação dos comandos
 class CadastrarUsuarioComando(Comando):
-    def __init__(self, gerenciador, login, senha, admin):
+    CAMPOS_OCULTOS = ("_senha",)
+    
+    def __init__(self, gerenciador, travas, login, senha, admin):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._login = login
         self._senha = senha
         self._admin = admin
     
     def executar(self):
-        return self._gerenciador.cadastrar(self._login, self._senha, self._admin)
+        with self._travas.travar(("usuario", self._login)):
+            return self._gerenciador.cadastrar(self._login, self._senha, self._admin)
+
+class ImportarUsuariosComando(Comando):
+    def __init__(self, gerenciador, travas, linhas):
+        self._gerenciador = gerenciador
+        self._travas = travas
+        self._linhas = linhas
+    
+    def executar(self):
+        with self._travas.travar(*[("usuario", linha[1]) for linha in self._linhas]):
+            return self._gerenciador.cadastrar_lote(self._linhas)
+    
+    def resumo(self):
+        # As linhas do lote não vão para o histórico
+        return {"linhas": len(self._linhas)}
 
 class AtualizarUsuarioComando(Comando):
-    def __init__(self, gerenciador, login, senha, admin):
+    CAMPOS_OCULTOS = ("_senha",)
+    
+    def __init__(self, gerenciador, travas, login, senha, admin):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._login = login
         self._senha = senha
         self._admin = admin
     
     def executar(self):
-        return self._gerenciador.atualizar(self._login, self._senha, self._admin)
+        with self._travas.travar(("usuario", self._login)):
+            return self._gerenciador.atualizar(self._login, self._senha, self._admin)
 
 class DeletarUsuarioComando(Comando):
-    def __init__(self, gerenciador, login):
+    def __init__(self, gerenciador, travas, login):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._login = login
     
     def executar(self):
-        return self._gerenciador.deletar(self._login)
+        with self._travas.travar(("usuario", self._login)):
+            return self._gerenciador.deletar(self._login)
 
 class CadastrarLivroComando(Comando):
-    def __init__(self, gerenciador, codigo, titulo, autor, ano, quantidade):
+    def __init__(self, gerenciador, travas, codigo, titulo, autor, ano, quantidade):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._codigo = codigo
         self._titulo = titulo
         self._autor = autor
@@ -135,11 +338,27 @@ class CadastrarLivroComando(Comando):
         self._quantidade = quantidade
     
     def executar(self):
-        return self._gerenciador.cadastrar(self._codigo, self._titulo, self._autor, self._ano, self._quantidade)
+        with self._travas.travar(("livro", self._codigo)):
+            return self._gerenciador.cadastrar(self._codigo, self._titulo, self._autor, self._ano, self._quantidade)
+
+class ImportarLivrosComando(Comando):
+    def __init__(self, gerenciador, travas, linhas):
+        self._gerenciador = gerenciador
+        self._travas = travas
+        self._linhas = linhas
+    
+    def executar(self):
+        with self._travas.travar(*[("livro", linha[1]) for linha in self._linhas]):
+            return self._gerenciador.cadastrar_lote(self._linhas)
+    
+    def resumo(self):
+        # As linhas do lote não vão para o histórico
+        return {"linhas": len(self._linhas)}
 
 class AtualizarLivroComando(Comando):
-    def __init__(self, gerenciador, codigo, titulo, autor, ano, quantidade):
+    def __init__(self, gerenciador, travas, codigo, titulo, autor, ano, quantidade):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._codigo = codigo
         self._titulo = titulo
         self._autor = autor
@@ -147,26 +366,38 @@ class AtualizarLivroComando(Comando):
         self._quantidade = quantidade
     
     def executar(self):
-        return self._gerenciador.atualizar(self._codigo, self._titulo, self._autor, self._ano, self._quantidade)
+        with self._travas.travar(("livro", self._codigo)):
+            return self._gerenciador.atualizar(self._codigo, self._titulo, self._autor, self._ano, self._quantidade)
 
 class DeletarLivroComando(Comando):
-    def __init__(self, gerenciador, codigo):
+    def __init__(self, gerenciador, travas, codigo):
         self._gerenciador = gerenciador
+        self._travas = travas
         self._codigo = codigo
     
     def executar(self):
-        return self._gerenciador.deletar(self._codigo)
+        with self._travas.travar(("livro", self._codigo)):
+            return self._gerenciador.deletar(self._codigo)
 
 class RealizarEmprestimoComando(Comando):
-    def __init__(self, gerenciador_emprestimos, gerenciador_usuarios, gerenciador_livros, codigo, login_usuario, codigo_livro):
+    def __init__(self, gerenciador_emprestimos, gerenciador_usuarios, gerenciador_livros, travas, codigo, login_usuario,
+                 codigo_livro, verificar_codigo=True):
         self._gerenciador_emprestimos = gerenciador_emprestimos
         self._gerenciador_usuarios = gerenciador_usuarios
         self._gerenciador_livros = gerenciador_livros
+        self._travas = travas
         self._codigo = codigo
         self._login_usuario = login_usuario
         self._codigo_livro = codigo_livro
+        self._verificar_codigo = verificar_codigo
     
     def executar(self):
+        # A verificação de disponibilidade e a baixa no estoque precisam ser atômicas
+        with self._travas.travar(("emprestimo", self._codigo), ("usuario", self._login_usuario),
+                                 ("livro", self._codigo_livro)):
+            return self._executar()
+    
+    def _executar(self):
         usuario = self._gerenciador_usuarios.buscar(self._login_usuario)
         livro = self._gerenciador_livros.buscar(self._codigo_livro)
         
@@ -177,31 +408,160 @@ class RealizarEmprestimoComando(Comando):
         if livro.disponivel <= 0:
             raise ValueError("Livro não disponível para empréstimo")
         
-        emprestimo = self._gerenciador_emprestimos.realizar(self._codigo, usuario, livro)
-        
-        # Atualizar disponibilidade do livro
+        # O empréstimo e a baixa no estoque são confirmados juntos
         livro.disponivel -= 1
-        self._gerenciador_livros.atualizar_disponibilidade(livro)
+        try:
+            with self._gerenciador_emprestimos.transacao():
+                emprestimo = self._gerenciador_emprestimos.realizar(self._codigo, usuario, livro,
+                                                                    self._verificar_codigo)
+                if self._gerenciador_livros.atualizar_disponibilidade(livro) is None:
+                    raise ValueError("Livro não encontrado")
+        except Exception:
+            livro.disponivel += 1
+            raise
         
         return emprestimo
 
 class DevolverLivroComando(Comando):
-    def __init__(self, gerenciador_emprestimos, gerenciador_livros, codigo_emprestimo):
+    def __init__(self, gerenciador_emprestimos, gerenciador_livros, travas, codigo_emprestimo):
         self._gerenciador_emprestimos = gerenciador_emprestimos
         self._gerenciador_livros = gerenciador_livros
+        self._travas = travas
         self._codigo_emprestimo = codigo_emprestimo
     
     def executar(self):
         emprestimo = self._gerenciador_emprestimos.buscar(self._codigo_emprestimo)
+        if not emprestimo:
+            raise ValueError("Empréstimo não encontrado")
+        
+        # O livro de um empréstimo não muda, então pode ser lido antes de travar
+        with self._travas.travar(("emprestimo", self._codigo_emprestimo), ("livro", emprestimo.codigo_livro)):
+            return self._executar()
+    
+    def _executar(self):
+        emprestimo = self._gerenciador_emprestimos.buscar(self._codigo_emprestimo)
         
         if not emprestimo:
             raise ValueError("Empréstimo não encontrado")
         if emprestimo.status != "Ativo":
             raise ValueError("Este empréstimo já foi devolvido")
         
-        # Atualizar disponibilidade do livro
+        # Atualizar disponibilidade do livro (a instância canônica, não uma cópia do empréstimo).
+        # Empréstimos são gravados antes dos livros, como nos demais comandos, para que as
+        # transações travem os arquivos sempre na mesma ordem
         livro = emprestimo.livro
-        livro.disponivel += 1
-        self._gerenciador_livros.atualizar_disponibilidade(livro)
+        if livro:
+            livro.disponivel += 1
+        try:
+            with self._gerenciador_emprestimos.transacao():
+                emprestimo = self._gerenciador_emprestimos.devolver(self._codigo_emprestimo)
+                if livro:
+                    if self._gerenciador_livros.atualizar_disponibilidade(livro) is None:
+                        raise ValueError("Livro do empréstimo não encontrado")
+        except Exception:
+            if livro:
+                livro.disponivel -= 1
+            raise
+        
+        return emprestimo
+
+class RealizarEmprestimosLoteComando(Comando):
+    def __init__(self, gerenciador_emprestimos, gerenciador_usuarios, gerenciador_livros, travas, login_usuario, itens):
+        self._gerenciador_emprestimos = gerenciador_emprestimos
+        self._gerenciador_usuarios = gerenciador_usuarios
+        self._gerenciador_livros = gerenciador_livros
+        self._travas = travas
+        self._login_usuario = login_usuario
+        self._itens = itens
+    
+    def executar(self):
+        chaves = [("usuario", self._login_usuario)]
+        for codigo, codigo_livro in self._itens:
+            chaves.append(("emprestimo", codigo))
+            chaves.append(("livro", codigo_livro))
+        with self._travas.travar(*chaves):
+            return self._executar()
+    
+    def _executar(self):
+        usuario = self._gerenciador_usuarios.buscar(self._login_usuario)
+        if not usuario:
+            raise ValueError("Usuário não encontrado")
+        
+        # Os livros são buscados uma única vez para o lote inteiro; os códigos vêm do
+        # GeradorCodigos e não precisam ser conferidos
+        livros = self._gerenciador_livros.buscar_varios([codigo_livro for _, codigo_livro in self._itens])
+        
+        resultado = ResultadoLote()
+        validos = []
+        for codigo, codigo_livro in self._itens:
+            livro = livros.get(codigo_livro)
+            if not livro:
+                resultado.falhas.append((codigo_livro, "Livro não encontrado"))
+            elif livro.disponivel <= 0:
+                resultado.falhas.append((codigo_livro, "Livro não disponível para empréstimo"))
+            else:
+                livro.disponivel -= 1
+                validos.append((codigo, livro))
+        if not validos:
+            return resultado
+        
+        # Um mesmo livro pode aparecer mais de uma vez no lote
+        livros_alterados = list({livro.codigo: livro for _, livro in validos}.values())
+        try:
+            with self._gerenciador_emprestimos.transacao():
+                resultado.sucessos = self._gerenciador_emprestimos.realizar_lote(validos, usuario)
+                if None in self._gerenciador_livros.atualizar_disponibilidade_varios(livros_alterados):
+                    raise ValueError("Livro não encontrado")
+        except Exception:
+            for _, livro in validos:
+                livro.disponivel += 1
+            raise
+        return resultado
+
+class DevolverLoteComando(Comando):
+    def __init__(self, gerenciador_emprestimos, gerenciador_livros, travas, codigos_emprestimo):
+        self._gerenciador_emprestimos = gerenciador_emprestimos
+        self._gerenciador_livros = gerenciador_livros
+        self._travas = travas
+        self._codigos_emprestimo = codigos_emprestimo
+    
+    def executar(self):
+        # O livro de um empréstimo não muda, então pode ser lido antes de travar
+        emprestimos = self._gerenciador_emprestimos.buscar_varios(self._codigos_emprestimo)
+        chaves = [("emprestimo", codigo) for codigo in self._codigos_emprestimo]
+        chaves.extend(("livro", emprestimo.codigo_livro) for emprestimo in emprestimos.values())
+        with self._travas.travar(*chaves):
+            return self._executar()
+    
+    def _executar(self):
+        emprestimos = self._gerenciador_emprestimos.buscar_varios(self._codigos_emprestimo)
+        
+        resultado = ResultadoLote()
+        validos = {}
+        for codigo in self._codigos_emprestimo:
+            emprestimo = emprestimos.get(codigo)
+            if not emprestimo:
+                resultado.falhas.append((codigo, "Empréstimo não encontrado"))
+            elif emprestimo.status != "Ativo" or codigo in validos:
+                resultado.falhas.append((codigo, "Este empréstimo já foi devolvido"))
+            else:
+                validos[codigo] = emprestimo
+        if not validos:
+            return resultado
+        
+        livros = {}
+        devolvidos = [emprestimo.livro for emprestimo in validos.values() if emprestimo.livro]
+        for livro in devolvidos:
+            livro.disponivel += 1
+            livros[livro.codigo] = livro
         
-        return self._gerenciador_emprestimos.devolver(self._codigo_emprestimo)
\ No newline at end of file
+        try:
+            with self._gerenciador_emprestimos.transacao():
+                resultado.sucessos = self._gerenciador_emprestimos.devolver_lote(list(validos.values()))
+                if None in self._gerenciador_livros.atualizar_disponibilidade_varios(list(livros.values())):
+                    raise ValueError("Livro do empréstimo não encontrado")
+        except Exception:
+            for livro in devolvidos:
+                livro.disponivel -= 1
+            raise
+        return resultado
\ No newline at end of file
@@ -0,0 +1,41 @@
+import re
+import threading
+
+class GeradorCodigos:
+    """Gera códigos sequenciais únicos sem consultar os registros existentes.
+
+    A sequência fica no DAO de metadados e é reservada em blocos: cada reserva
+    incrementa o contador persistido em `tamanho_bloco` de uma só vez, e os
+    códigos do bloco são entregues da memória. Um código nunca se repete, mesmo
+    após reiniciar (no pior caso sobra um intervalo sem uso do bloco anterior).
+    """
+
+    def __init__(self, metadados_dao, chave="sequencia_emprestimos", prefixo="EMP", tamanho_bloco=100):
+        self._metadados_dao = metadados_dao
+        self._chave = chave
+        self._prefixo = prefixo
+        self._tamanho_bloco = tamanho_bloco
+        self._proximo = 0
+        self._limite = 0
+        self._trava = threading.Lock()
+        self._formato = re.compile(re.escape(prefixo) + r"\d{8}")
+
+    def _reservar_bloco(self):
+        self._limite = self._metadados_dao.incrementar(self._chave, self._tamanho_bloco)
+        self._proximo = self._limite - self._tamanho_bloco
+
+    def proximo(self):
+        with self._trava:
+            if self._proximo >= self._limite:
+                self._reservar_bloco()
+            numero = self._proximo
+            self._proximo += 1
+        # Oito dígitos não colidem com os códigos antigos (EMP + até quatro dígitos aleatórios)
+        return f"{self._prefixo}{numero + 1:08d}"
+
+    def proximos(self, quantidade):
+        return [self.proximo() for _ in range(quantidade)]
+    
+    def reservado(self, codigo):
+        """Indica se o código tem o formato dos gerados aqui e, por isso, não pode ser escolhido por fora"""
+        return self._formato.fullmatch(codigo) is not None
\ No newline at end of file
@@ -1,16 +1,59 @@
+import threading
+from contextlib import contextmanager
 from models.emprestimo import Emprestimo
 from business.relatorios.relatorio_emprestimos import RelatorioEmprestimos
+from util.efeitos import adiar_efeitos, aplicar_efeito
+
+class ResultadoLote:
+    """Empréstimos processados e falhas (codigo, mensagem) de uma operação em lote"""
+    
+    def __init__(self):
+        self.sucessos = []
+        self.falhas = []
+    
+    def __str__(self):
+        linhas = [str(emprestimo) for emprestimo in self.sucessos]
+        linhas.extend(f"Falha em '{codigo}': {mensagem}" for codigo, mensagem in self.falhas)
+        return "\n".join(linhas)
+
 
 class GerenciadorEmprestimos:
-    def __init__(self, emprestimo_dao):
+    def __init__(self, emprestimo_dao, gerenciador_usuarios, gerenciador_livros, estatisticas):
         self._emprestimo_dao = emprestimo_dao
+        self._observadores = []
+        self._estatisticas = estatisticas
+        self.adicionar_observador(estatisticas)
+        # Usuário e livro de cada empréstimo são resolvidos pelos mapas de identidade dos gerenciadores
+        self._gerenciador_usuarios = gerenciador_usuarios
+        self._gerenciador_livros = gerenciador_livros
+        # Índices secundários (código do empréstimo em dicts, que preservam a ordem de inserção).
+        # Só são usados quando o DAO não oferece consultas indexadas próprias.
+        self._indexado_no_dao = hasattr(emprestimo_dao, "buscar_por_usuario")
+        self._por_usuario = None
+        self._por_livro = None
+        self._ativos = None
+        self._trava_indices = threading.RLock()
+        # Compensações da transação aberta na thread atual (ver transacao)
+        self._local = threading.local()
     
-    def realizar(self, codigo, usuario, livro):
-        if self.buscar(codigo):
+    def realizar(self, codigo, usuario, livro, verificar_codigo=True):
+        # Códigos do GeradorCodigos são únicos por construção e dispensam a consulta
+        if verificar_codigo and self.buscar(codigo):
             raise ValueError(f"Empréstimo com código '{codigo}' já existe")
         
         emprestimo = Emprestimo(codigo, usuario, livro)
-        return self._emprestimo_dao.salvar(emprestimo)
+        self._emprestimo_dao.salvar(emprestimo)
+        self._compensar(lambda: self._emprestimo_dao.deletar(codigo))
+        self._vincular(emprestimo)
+        
+        def indexar():
+            with self._trava_indices:
+                if self._ativos is not None:
+                    self._indexar(emprestimo)
+            for observador in self._observadores:
+                observador.emprestimo_realizado(emprestimo)
+        aplicar_efeito(indexar)
+        return emprestimo
     
     def devolver(self, codigo):
         emprestimo = self.buscar(codigo)
@@ -18,18 +61,196 @@ class GerenciadorEmprestimos:
             raise ValueError(f"Empréstimo com código '{codigo}' não encontrado")
         
         emprestimo.devolver()
-        return self._emprestimo_dao.atualizar(emprestimo)
+        self._vincular(self._emprestimo_dao.atualizar(emprestimo))
+        
+        def reabrir():
+            emprestimo.reabrir()
+            self._emprestimo_dao.atualizar(emprestimo)
+        self._compensar(reabrir)
+        
+        def desindexar():
+            with self._trava_indices:
+                if self._ativos is not None:
+                    self._ativos.pop(codigo, None)
+            for observador in self._observadores:
+                observador.emprestimo_devolvido(emprestimo)
+        aplicar_efeito(desindexar)
+        return emprestimo
+    
+    def realizar_lote(self, itens, usuario):
+        """Grava de uma vez os empréstimos de `itens` (codigo, livro), já validados, para o usuário"""
+        emprestimos = [Emprestimo(codigo, usuario, livro) for codigo, livro in itens]
+        self._emprestimo_dao.salvar_varios(emprestimos)
+        
+        def excluir():
+            for emprestimo in emprestimos:
+                self._emprestimo_dao.deletar(emprestimo.codigo)
+        self._compensar(excluir)
+        self._vincular_todos(emprestimos)
+        
+        def indexar():
+            with self._trava_indices:
+                if self._ativos is not None:
+                    for emprestimo in emprestimos:
+                        self._indexar(emprestimo)
+            for observador in self._observadores:
+                observador.emprestimos_realizados(emprestimos)
+        aplicar_efeito(indexar)
+        return emprestimos
+    
+    def devolver_lote(self, emprestimos):
+        """Registra de uma vez a devolução dos empréstimos, já validados como ativos"""
+        for emprestimo in emprestimos:
+            emprestimo.devolver()
+        self._emprestimo_dao.atualizar_varios(emprestimos)
+        
+        def reabrir():
+            for emprestimo in emprestimos:
+                emprestimo.reabrir()
+            self._emprestimo_dao.atualizar_varios(emprestimos)
+        self._compensar(reabrir)
+        
+        def desindexar():
+            with self._trava_indices:
+                if self._ativos is not None:
+                    for emprestimo in emprestimos:
+                        self._ativos.pop(emprestimo.codigo, None)
+            for observador in self._observadores:
+                observador.emprestimos_devolvidos(emprestimos)
+        aplicar_efeito(desindexar)
+        return emprestimos
+    
+    @contextmanager
+    def transacao(self):
+        """Torna atômicas as gravações de empréstimos e livros feitas dentro do contexto.
+        
+        Índices e observadores só são atualizados depois da confirmação; se ela falhar, ficam como estavam.
+        Nos armazenamentos sem transações (memória, journal, mmap, arquivo com cache) as gravações de
+        empréstimos já feitas são desfeitas por compensação quando algo falha dentro do contexto.
+        """
+        if self._emprestimo_dao.transacional or getattr(self._local, "compensacoes", None) is not None:
+            with adiar_efeitos(), self._emprestimo_dao.transacao():
+                yield
+            return
+        
+        self._local.compensacoes = compensacoes = []
+        try:
+            with adiar_efeitos():
+                yield
+        except BaseException:
+            for compensacao in reversed(compensacoes):
+                compensacao()
+            raise
+        finally:
+            self._local.compensacoes = None
+    
+    def _compensar(self, compensacao):
+        compensacoes = getattr(self._local, "compensacoes", None)
+        if compensacoes is not None:
+            compensacoes.append(compensacao)
+    
+    def adicionar_observador(self, observador):
+        """Registra um objeto com os métodos emprestimo_realizado(e), emprestimo_devolvido(e),
+        emprestimos_realizados(lista) e emprestimos_devolvidos(lista)"""
+        self._observadores.append(observador)
     
     def buscar(self, codigo):
-        return self._emprestimo_dao.buscar(codigo)
+        return self._vincular(self._emprestimo_dao.buscar(codigo))
+    
+    def buscar_varios(self, codigos):
+        """Retorna um dict codigo -> empréstimo com os que existem"""
+        emprestimos = [e for e in self._emprestimo_dao.buscar_varios(codigos) if e is not None]
+        return {emprestimo.codigo: emprestimo for emprestimo in self._vincular_todos(emprestimos)}
     
     def buscar_todos(self):
-        return self._emprestimo_dao.buscar_todos()
+        return self._vincular_todos(self._emprestimo_dao.buscar_todos())
+    
+    def buscar_pagina(self, offset=0, limite=20, ordem=None):
+        return self._vincular_todos(self._emprestimo_dao.buscar_pagina(offset, limite, ordem))
+    
+    def iterar(self, tamanho_lote=100):
+        lote = []
+        for emprestimo in self._emprestimo_dao.iterar(tamanho_lote):
+            lote.append(emprestimo)
+            if len(lote) == tamanho_lote:
+                yield from self._vincular_todos(lote)
+                lote = []
+        yield from self._vincular_todos(lote)
     
     def buscar_por_usuario(self, login_usuario):
-        emprestimos = self.buscar_todos()
-        return [e for e in emprestimos if e.usuario.login == login_usuario]
+        # DAOs com consulta indexada (ex.: SQLite) filtram no próprio armazenamento
+        if self._indexado_no_dao:
+            return self._vincular_todos(self._emprestimo_dao.buscar_por_usuario(login_usuario))
+        
+        with self._trava_indices:
+            self._garantir_indices()
+            codigos = list(self._por_usuario.get(login_usuario, {}))
+        return self._buscar_codigos(codigos)
+    
+    def buscar_por_livro(self, codigo_livro):
+        if self._indexado_no_dao:
+            return self._vincular_todos(self._emprestimo_dao.buscar_por_livro(codigo_livro))
+        
+        with self._trava_indices:
+            self._garantir_indices()
+            codigos = list(self._por_livro.get(codigo_livro, {}))
+        return self._buscar_codigos(codigos)
+    
+    def buscar_ativos(self):
+        if self._indexado_no_dao:
+            return self._vincular_todos(self._emprestimo_dao.buscar_ativos())
+        
+        with self._trava_indices:
+            self._garantir_indices()
+            codigos = list(self._ativos)
+        return self._buscar_codigos(codigos)
+    
+    def _buscar_codigos(self, codigos):
+        emprestimos = self._emprestimo_dao.buscar_varios(codigos)
+        return self._vincular_todos([e for e in emprestimos if e is not None])
+    
+    def _garantir_indices(self):
+        # Os índices são montados na primeira consulta, com uma única leitura de todos os empréstimos
+        if self._ativos is not None:
+            return
+        
+        self._por_usuario = {}
+        self._por_livro = {}
+        self._ativos = {}
+        for emprestimo in self._emprestimo_dao.buscar_todos():
+            self._indexar(emprestimo)
+    
+    def _indexar(self, emprestimo):
+        self._por_usuario.setdefault(emprestimo.login_usuario, {})[emprestimo.codigo] = None
+        self._por_livro.setdefault(emprestimo.codigo_livro, {})[emprestimo.codigo] = None
+        if emprestimo.status == "Ativo":
+            self._ativos[emprestimo.codigo] = None
+    
+    def _vincular(self, emprestimo):
+        if emprestimo is not None:
+            emprestimo.vincular(self._gerenciador_usuarios.buscar, self._gerenciador_livros.buscar)
+        return emprestimo
+    
+    def _vincular_todos(self, emprestimos):
+        # Carrega de uma vez os usuários e livros referenciados que ainda não estão no mapa
+        self._gerenciador_usuarios.buscar_varios({e.login_usuario for e in emprestimos})
+        self._gerenciador_livros.buscar_varios({e.codigo_livro for e in emprestimos})
+        for emprestimo in emprestimos:
+            self._vincular(emprestimo)
+        return emprestimos
+    
+    def resumir_emprestimos(self):
+        """Totais (total, ativos, devolvidos) e top-k de usuários e de livros (pelo título)"""
+        if not self._estatisticas.pronto:
+            self._estatisticas.reconstruir(self._emprestimo_dao.iterar())
+        
+        resumo = self._estatisticas.resumo()
+        # Só os títulos dos livros do top-k precisam ser buscados
+        livros = self._gerenciador_livros.buscar_varios([codigo for codigo, _ in resumo["top_livros"]])
+        resumo["top_livros"] = [(livros[codigo].titulo if codigo in livros else codigo, contagem)
+                                for codigo, contagem in resumo["top_livros"]]
+        return resumo
     
     def gerar_relatorio_emprestimos(self):
         relatorio = RelatorioEmprestimos()
-        return relatorio.gerar(self.buscar_todos())
\ No newline at end of file
+        return relatorio.gerar(self.resumir_emprestimos())
\ No newline at end of file
@@ -1,23 +1,71 @@
+import bisect
+import threading
 from models.livro import Livro
 from util.memento import Memento
+from util.mapa_identidade import MapaIdentidade
+from business.motor_busca import MotorBusca
+from util.efeitos import aplicar_efeito
 
 class GerenciadorLivros:
     def __init__(self, livro_dao):
         self._livro_dao = livro_dao
         self._mementos = {}
+        self._mapa = MapaIdentidade(livro_dao.buscar, livro_dao.buscar_varios)
+        # DAOs com registros de tamanho fixo gravam a disponibilidade sem reescrever o livro
+        self._grava_disponivel = hasattr(livro_dao, "atualizar_disponivel")
+        self._motor_busca = None
+        # Códigos (ordenados) dos livros com exemplares disponíveis
+        self._disponiveis = None
+        # Protege o motor de busca e o índice de disponíveis contra acesso concorrente
+        self._trava_indices = threading.RLock()
     
     def cadastrar(self, codigo, titulo, autor, ano, quantidade):
         if self.buscar(codigo):
             raise ValueError(f"Livro com código '{codigo}' já existe")
         
         livro = Livro(codigo, titulo, autor, ano, quantidade)
-        return self._livro_dao.salvar(livro)
+        self._livro_dao.salvar(livro)
+        self._indexar(livro)
+        self._atualizar_disponiveis(livro)
+        return self._mapa.substituir(codigo, livro)
+    
+    def cadastrar_lote(self, linhas):
+        """Cadastra vários livros com uma única gravação.
+
+        `linhas` é uma lista de (numero, codigo, titulo, autor, ano, quantidade).
+        Retorna a quantidade cadastrada e os erros como (numero, mensagem).
+        """
+        erros = []
+        existentes = self.buscar_varios([linha[1] for linha in linhas])
+        novos = {}
+        for numero, codigo, titulo, autor, ano, quantidade in linhas:
+            if codigo in existentes or codigo in novos:
+                erros.append((numero, f"Livro com código '{codigo}' já existe"))
+            else:
+                novos[codigo] = Livro(codigo, titulo, autor, ano, quantidade)
+        
+        self._livro_dao.salvar_varios(list(novos.values()))
+        for codigo, livro in novos.items():
+            self._indexar(livro)
+            self._atualizar_disponiveis(livro)
+            self._mapa.substituir(codigo, livro)
+        return len(novos), erros
     
     def buscar(self, codigo):
-        return self._livro_dao.buscar(codigo)
+        return self._mapa.obter(codigo)
+    
+    def buscar_varios(self, codigos):
+        return self._mapa.obter_varios(codigos)
     
     def buscar_todos(self):
-        return self._livro_dao.buscar_todos()
+        return [self._mapa.registrar(livro.codigo, livro) for livro in self._livro_dao.buscar_todos()]
+    
+    def buscar_pagina(self, offset=0, limite=20, ordem=None):
+        return [self._mapa.registrar(livro.codigo, livro) for livro in self._livro_dao.buscar_pagina(offset, limite, ordem)]
+    
+    def iterar(self, tamanho_lote=100):
+        for livro in self._livro_dao.iterar(tamanho_lote):
+            yield self._mapa.registrar(livro.codigo, livro)
     
     def atualizar(self, codigo, titulo, autor, ano, quantidade):
         livro = self.buscar(codigo)
@@ -32,18 +80,120 @@ class GerenciadorLivros:
         novo_livro = Livro(codigo, titulo, autor, ano, quantidade)
         novo_livro.disponivel = novo_disponivel
         
+        self._mapa.substituir(codigo, novo_livro)
+        self._indexar(novo_livro)
+        self._atualizar_disponiveis(novo_livro)
         return self._livro_dao.atualizar(novo_livro)
     
     def atualizar_disponibilidade(self, livro):
-        return self._livro_dao.atualizar(livro)
+        """Grava a disponibilidade do livro; retorna None se ele não existe mais no armazenamento"""
+        if self._grava_disponivel:
+            atualizado = livro if self._livro_dao.atualizar_disponivel(livro.codigo, livro.disponivel) else None
+        else:
+            atualizado = self._livro_dao.atualizar(livro)
+        self._registrar_disponibilidade([livro], [atualizado])
+        return atualizado
+    
+    def atualizar_disponibilidade_varios(self, livros):
+        if self._grava_disponivel:
+            # Uma gravação por livro: se uma falhar, as anteriores voltam ao valor que estava gravado
+            gravados = []
+            try:
+                for livro in livros:
+                    anterior = self._livro_dao.buscar(livro.codigo)
+                    gravados.append((anterior, self.atualizar_disponibilidade(livro)))
+            except Exception:
+                for anterior, atualizado in gravados:
+                    if atualizado is not None:
+                        self._livro_dao.atualizar_disponivel(anterior.codigo, anterior.disponivel)
+                raise
+            return [atualizado for _, atualizado in gravados]
+        atualizados = self._livro_dao.atualizar_varios(livros)
+        self._registrar_disponibilidade(livros, atualizados)
+        return atualizados
+    
+    def _registrar_disponibilidade(self, livros, atualizados):
+        # Só o que foi gravado volta ao mapa e, depois da confirmação da transação, ao índice de disponíveis
+        gravados = []
+        for livro, atualizado in zip(livros, atualizados):
+            if atualizado is None:
+                self._esquecer(livro.codigo)
+            else:
+                self._mapa.substituir(livro.codigo, livro)
+                gravados.append(livro)
+        
+        def atualizar_disponiveis():
+            for livro in gravados:
+                self._atualizar_disponiveis(livro)
+        aplicar_efeito(atualizar_disponiveis)
     
     def deletar(self, codigo):
         livro = self.buscar(codigo)
         if not livro:
             raise ValueError(f"Livro com código '{codigo}' não encontrado")
         
+        self._esquecer(codigo)
         return self._livro_dao.deletar(codigo)
     
+    def _esquecer(self, codigo):
+        # Tira o livro do mapa de identidade e dos índices
+        self._mapa.remover(codigo)
+        with self._trava_indices:
+            if self._motor_busca is not None:
+                self._motor_busca.remover(codigo)
+            if self._disponiveis is not None:
+                self._remover_disponivel(codigo)
+    
+    def pesquisar(self, consulta, limite=10):
+        with self._trava_indices:
+            if self._motor_busca is None:
+                # O índice é montado na primeira pesquisa e depois mantido a cada alteração
+                self._motor_busca = MotorBusca()
+                for livro in self.buscar_todos():
+                    self._motor_busca.indexar(livro)
+            
+            codigos = self._motor_busca.pesquisar(consulta, limite)
+        livros = self.buscar_varios(codigos)
+        return [livros[codigo] for codigo in codigos if codigo in livros]
+    
+    def buscar_disponiveis(self, offset=0, limite=20):
+        with self._trava_indices:
+            self._garantir_disponiveis()
+            codigos = self._disponiveis[offset:offset + limite]
+        livros = self.buscar_varios(codigos)
+        return [livros[codigo] for codigo in codigos if codigo in livros]
+    
+    def contar_disponiveis(self):
+        with self._trava_indices:
+            self._garantir_disponiveis()
+            return len(self._disponiveis)
+    
+    def _garantir_disponiveis(self):
+        if self._disponiveis is None:
+            self._disponiveis = sorted(livro.codigo for livro in self.buscar_todos() if livro.disponivel > 0)
+    
+    def _atualizar_disponiveis(self, livro):
+        with self._trava_indices:
+            if self._disponiveis is None:
+                return
+            
+            posicao = bisect.bisect_left(self._disponiveis, livro.codigo)
+            presente = posicao < len(self._disponiveis) and self._disponiveis[posicao] == livro.codigo
+            if livro.disponivel > 0 and not presente:
+                self._disponiveis.insert(posicao, livro.codigo)
+            elif livro.disponivel <= 0 and presente:
+                del self._disponiveis[posicao]
+    
+    def _remover_disponivel(self, codigo):
+        posicao = bisect.bisect_left(self._disponiveis, codigo)
+        if posicao < len(self._disponiveis) and self._disponiveis[posicao] == codigo:
+            del self._disponiveis[posicao]
+    
+    def _indexar(self, livro):
+        with self._trava_indices:
+            if self._motor_busca is not None:
+                self._motor_busca.indexar(livro)
+    
     def _salvar_memento(self, livro):
         novo_livro = Livro(livro.codigo, livro.titulo, livro.autor, livro.ano, livro.quantidade)
         novo_livro.disponivel = livro.disponivel
@@ -60,8 +210,13 @@ class GerenciadorLivros:
         if codigo not in self._mementos:
             raise ValueError(f"Não há estado anterior para o livro '{codigo}'")
         
-        estado_anterior = self._mementos[codigo].get_estado()
-        self._livro_dao.atualizar(estado_anterior)
-        del self._mementos[codigo]
+        estado_anterior = self._mementos.pop(codigo).get_estado()
+        if self._livro_dao.atualizar(estado_anterior) is None:
+            # Excluído depois da alteração: não volta ao mapa nem aos índices
+            self._esquecer(codigo)
+            raise ValueError(f"O livro '{codigo}' foi excluído e não pode ser restaurado")
+        self._mapa.substituir(codigo, estado_anterior)
+        self._indexar(estado_anterior)
+        self._atualizar_disponiveis(estado_anterior)
         
         return estado_anterior
\ No newline at end of file
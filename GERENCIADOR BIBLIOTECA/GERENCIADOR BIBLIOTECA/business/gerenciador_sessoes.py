@@ -0,0 +1,83 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from util.exceptions import SessaoInvalida
+
+class Sessao:
+    """Usuário e permissões de um login, como estavam na autenticação"""
+
+    __slots__ = ("token", "login", "admin", "expira")
+
+    def __init__(self, token, login, admin, expira):
+        self.token = token
+        self.login = login
+        self.admin = admin
+        self.expira = expira
+
+
+class GerenciadorSessoes:
+    """Tokens opacos emitidos no login e resolvidos em memória, sem consultar o armazenamento.
+
+    Cada uso renova a validade da sessão; sessões paradas por mais de `validade`
+    segundos expiram, e acima de `capacidade` as menos usadas são descartadas.
+    """
+
+    def __init__(self, validade=1800, capacidade=10000):
+        self._validade = validade
+        self._capacidade = capacidade
+        # token -> Sessao, da menos para a mais recentemente usada
+        self._sessoes = OrderedDict()
+        # login -> tokens, para encerrar as sessões de um usuário alterado ou removido
+        self._por_login = {}
+        self._trava = threading.Lock()
+
+    def iniciar(self, usuario):
+        token = secrets.token_urlsafe(32)
+        sessao = Sessao(token, usuario.login, usuario.admin, time.monotonic() + self._validade)
+        with self._trava:
+            self._sessoes[token] = sessao
+            self._por_login.setdefault(usuario.login, set()).add(token)
+            while len(self._sessoes) > self._capacidade:
+                _, antiga = self._sessoes.popitem(last=False)
+                self._desvincular(antiga)
+        return sessao
+
+    def resolver(self, token):
+        """Retorna a Sessao do token ou levanta SessaoInvalida"""
+        agora = time.monotonic()
+        with self._trava:
+            sessao = self._sessoes.get(token)
+            if sessao is None:
+                raise SessaoInvalida("Sessão inválida ou encerrada")
+            if sessao.expira < agora:
+                del self._sessoes[token]
+                self._desvincular(sessao)
+                raise SessaoInvalida("Sessão expirada")
+            sessao.expira = agora + self._validade
+            self._sessoes.move_to_end(token)
+            return sessao
+
+    def encerrar(self, token):
+        with self._trava:
+            sessao = self._sessoes.pop(token, None)
+            if sessao is not None:
+                self._desvincular(sessao)
+        return sessao is not None
+
+    def encerrar_do_usuario(self, login):
+        """Encerra todas as sessões de um usuário"""
+        with self._trava:
+            for token in self._por_login.pop(login, ()):
+                self._sessoes.pop(token, None)
+
+    def _desvincular(self, sessao):
+        tokens = self._por_login.get(sessao.login)
+        if tokens is not None:
+            tokens.discard(sessao.token)
+            if not tokens:
+                del self._por_login[sessao.login]
+
+    def __len__(self):
+        with self._trava:
+            return len(self._sessoes)
\ No newline at end of file
@@ -1,13 +1,44 @@
 from models.usuario import Usuario
 from util.exceptions import LoginInvalido, SenhaInvalida
 from util.memento import Memento
+from util.mapa_identidade import MapaIdentidade
+from util import senhas
+from util.senhas import CacheVerificacoes
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import os
 import re
+import threading
+import time
 from business.relatorios.relatorio_acessos import RelatorioAcessos
+from business.relatorios.ranking_acessos import RankingAcessos
 
 class GerenciadorUsuarios:
-    def __init__(self, usuario_dao):
+    def __init__(self, usuario_dao, intervalo_descarga=5.0, limite_acessos_pendentes=100,
+                 iteracoes_hash=senhas.ITERACOES, threads_hash=None):
         self._usuario_dao = usuario_dao
         self._mementos = {}
+        self._mapa = MapaIdentidade(usuario_dao.buscar, usuario_dao.buscar_varios)
+        self._ranking = None
+        self._trava_ranking = threading.RLock()
+        # Contagens de acesso ainda não gravadas: login -> instância canônica (já incrementada).
+        # São gravadas juntas a cada `intervalo_descarga` segundos, ao chegar a
+        # `limite_acessos_pendentes` usuários ou no encerramento.
+        self._acessos_pendentes = {}
+        self._trava_acessos = threading.Lock()
+        # Serializa a descarga com as gravações que substituem ou removem um usuário
+        self._trava_descarga = threading.RLock()
+        self._limite_acessos_pendentes = limite_acessos_pendentes
+        if intervalo_descarga is not None:
+            threading.Thread(target=self._descarregar_periodicamente, args=(intervalo_descarga,), daemon=True,
+                             name="descarga-acessos").start()
+        atexit.register(self.descarregar_acessos)
+        # O PBKDF2 libera o GIL: o pool limita quantos hashes rodam ao mesmo tempo
+        # sem serializar os logins, e o cache evita refazê-los em logins repetidos
+        self._iteracoes_hash = iteracoes_hash
+        self._executor_hash = ThreadPoolExecutor(max_workers=threads_hash or os.cpu_count() or 1,
+                                                 thread_name_prefix="hash-senhas")
+        self._verificacoes = CacheVerificacoes()
     
     def cadastrar(self, login, senha, admin=False):
         self._validar_login(login)
@@ -16,46 +47,166 @@ class GerenciadorUsuarios:
         if self.buscar(login):
             raise ValueError(f"Usuário com login '{login}' já existe")
         
-        usuario = Usuario(login, senha, admin)
-        return self._usuario_dao.salvar(usuario)
+        usuario = Usuario(login, self._gerar_hash(senha), admin)
+        self._usuario_dao.salvar(usuario)
+        self._atualizar_ranking(usuario)
+        return self._mapa.substituir(login, usuario)
+    
+    def cadastrar_lote(self, linhas):
+        """Cadastra vários usuários com uma única gravação.
+
+        `linhas` é uma lista de (numero, login, senha, admin). Linhas inválidas
+        são ignoradas e retornadas como (numero, mensagem); as demais são gravadas.
+        """
+        erros = []
+        validas = []
+        for numero, login, senha, admin in linhas:
+            try:
+                self._validar_login(login)
+                self._validar_senha(senha)
+            except (LoginInvalido, SenhaInvalida) as e:
+                erros.append((numero, str(e)))
+            else:
+                validas.append((numero, login, senha, admin))
+        
+        existentes = self.buscar_varios([login for _, login, _, _ in validas])
+        aceitas = {}
+        for numero, login, senha, admin in validas:
+            if login in existentes or login in aceitas:
+                erros.append((numero, f"Usuário com login '{login}' já existe"))
+            else:
+                aceitas[login] = (senha, admin)
+        
+        # Os hashes do lote são calculados em paralelo
+        hashes = self._executor_hash.map(lambda senha: senhas.gerar_hash(senha, self._iteracoes_hash),
+                                         [senha for senha, _ in aceitas.values()])
+        novos = {login: Usuario(login, hash_senha, admin)
+                 for (login, (_, admin)), hash_senha in zip(aceitas.items(), hashes)}
+        
+        self._usuario_dao.salvar_varios(list(novos.values()))
+        for login, usuario in novos.items():
+            self._atualizar_ranking(usuario)
+            self._mapa.substituir(login, usuario)
+        return len(novos), erros
     
     def buscar(self, login):
-        return self._usuario_dao.buscar(login)
+        return self._mapa.obter(login)
+    
+    def buscar_varios(self, logins):
+        return self._mapa.obter_varios(logins)
     
     def buscar_todos(self):
-        return self._usuario_dao.buscar_todos()
+        return [self._mapa.registrar(usuario.login, usuario) for usuario in self._usuario_dao.buscar_todos()]
+    
+    def buscar_pagina(self, offset=0, limite=20, ordem=None):
+        if ordem and ordem.lstrip("-") == "acessos":
+            # A ordenação é feita pelo armazenamento, que precisa das contagens atuais
+            self.descarregar_acessos()
+        return [self._mapa.registrar(usuario.login, usuario)
+                for usuario in self._usuario_dao.buscar_pagina(offset, limite, ordem)]
+    
+    def iterar(self, tamanho_lote=100):
+        for usuario in self._usuario_dao.iterar(tamanho_lote):
+            yield self._mapa.registrar(usuario.login, usuario)
     
     def atualizar(self, login, senha, admin):
+        """Atualiza senha e perfil; com `senha` None a senha atual é mantida"""
         usuario = self.buscar(login)
         if not usuario:
             raise ValueError(f"Usuário com login '{login}' não encontrado")
         
         self._salvar_memento(usuario)
         
-        self._validar_senha(senha)
-        usuario = Usuario(login, senha, admin)
-        return self._usuario_dao.atualizar(usuario)
+        if senha is None:
+            hash_senha = usuario.senha
+        else:
+            self._validar_senha(senha)
+            hash_senha = self._gerar_hash(senha)
+        usuario = Usuario(login, hash_senha, admin)
+        with self._trava_descarga:
+            self._descartar_acesso_pendente(login)
+            self._verificacoes.remover(login)
+            self._mapa.substituir(login, usuario)
+            self._atualizar_ranking(usuario)
+            return self._usuario_dao.atualizar(usuario)
     
     def deletar(self, login):
         usuario = self.buscar(login)
         if not usuario:
             raise ValueError(f"Usuário com login '{login}' não encontrado")
         
-        return self._usuario_dao.deletar(login)
+        with self._trava_descarga:
+            self._descartar_acesso_pendente(login)
+            self._verificacoes.remover(login)
+            self._mapa.remover(login)
+            with self._trava_ranking:
+                if self._ranking is not None:
+                    self._ranking.remover(login)
+            return self._usuario_dao.deletar(login)
     
     def autenticar(self, login, senha):
         usuario = self.buscar(login)
         if not usuario:
             return None
         
-        if usuario.senha != senha:
-            return None
+        armazenada = usuario.senha
+        if not self._verificacoes.confere(login, senha, armazenada):
+            if not self._executor_hash.submit(senhas.verificar, senha, armazenada).result():
+                return None
+            if senhas.precisa_atualizar(armazenada, self._iteracoes_hash):
+                # Migração transparente: senha em texto puro (ou com custo antigo) vira hash no login
+                armazenada = self._gerar_hash(senha)
+                usuario.alterar_senha(armazenada)
+                with self._trava_descarga:
+                    self._usuario_dao.atualizar(usuario)
+            self._verificacoes.registrar(login, senha, armazenada)
 
-        usuario.incrementar_acesso()
-        self._usuario_dao.atualizar(usuario)
+        # A instância canônica e o ranking já refletem o acesso; a gravação fica para a próxima descarga.
+        # Contador e ranking mudam juntos: um ranking montado ao mesmo tempo não conta o acesso duas vezes
+        with self._trava_ranking:
+            usuario.incrementar_acesso()
+            if self._ranking is not None:
+                self._ranking.incrementar(login)
+        with self._trava_acessos:
+            self._acessos_pendentes[login] = usuario
+            cheio = len(self._acessos_pendentes) >= self._limite_acessos_pendentes
+        if cheio:
+            self.descarregar_acessos()
         
         return usuario
     
+    def descarregar_acessos(self):
+        """Grava de uma vez as contagens de acesso pendentes"""
+        with self._trava_descarga:
+            with self._trava_acessos:
+                usuarios = list(self._acessos_pendentes.values())
+                self._acessos_pendentes.clear()
+            if usuarios:
+                try:
+                    self._usuario_dao.atualizar_varios(usuarios)
+                except Exception:
+                    # Voltam a ficar pendentes para a próxima descarga
+                    with self._trava_acessos:
+                        for usuario in usuarios:
+                            self._acessos_pendentes.setdefault(usuario.login, usuario)
+                    raise
+    
+    def _descarregar_periodicamente(self, intervalo):
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.descarregar_acessos()
+            except Exception:
+                pass  # tenta de novo no próximo intervalo
+    
+    def _descartar_acesso_pendente(self, login):
+        # O usuário vai ser substituído ou removido: a instância pendente não deve ser gravada por cima
+        with self._trava_acessos:
+            self._acessos_pendentes.pop(login, None)
+    
+    def _gerar_hash(self, senha):
+        return self._executor_hash.submit(senhas.gerar_hash, senha, self._iteracoes_hash).result()
+    
     def _validar_login(self, login):
         if not login:
             raise LoginInvalido("Login não pode ser vazio")
@@ -97,11 +248,43 @@ class GerenciadorUsuarios:
         if login not in self._mementos:
             raise ValueError(f"Não há estado anterior para o usuário '{login}'")
         
-        estado_anterior = self._mementos[login].get_estado()
-        self._usuario_dao.atualizar(estado_anterior)
-        del self._mementos[login]
+        estado_anterior = self._mementos.pop(login).get_estado()
+        with self._trava_descarga:
+            self._descartar_acesso_pendente(login)
+            if self._usuario_dao.atualizar(estado_anterior) is None:
+                # Excluído depois da alteração: não volta ao mapa nem ao ranking, e não autentica mais
+                self._verificacoes.remover(login)
+                self._mapa.remover(login)
+                with self._trava_ranking:
+                    if self._ranking is not None:
+                        self._ranking.remover(login)
+                raise ValueError(f"O usuário '{login}' foi excluído e não pode ser restaurado")
+            self._mapa.substituir(login, estado_anterior)
+            self._atualizar_ranking(estado_anterior)
         return estado_anterior
     
-    def gerar_relatorio_acessos(self):
+    def _atualizar_ranking(self, usuario):
+        with self._trava_ranking:
+            if self._ranking is not None:
+                self._ranking.definir(usuario.login, usuario.acessos)
+    
+    def gerar_relatorio_acessos(self, top_n=None):
+        with self._trava_ranking:
+            if self._ranking is None:
+                # Montado uma única vez; depois é mantido a cada cadastro, alteração e login
+                self._ranking = RankingAcessos()
+                for usuario in self.iterar():
+                    self._ranking.definir(usuario.login, usuario.acessos)
+            
+            ranking = self._ranking.top(top_n)
+            total_usuarios = self._ranking.total_usuarios
+            total_acessos = self._ranking.total_acessos
+        usuarios = self.buscar_varios([login for login, _ in ranking])
+        dados = {
+            "total_usuarios": total_usuarios,
+            "total_acessos": total_acessos,
+            "ranking": [(login, acessos, login in usuarios and usuarios[login].admin) for login, acessos in ranking],
+        }
+        
         relatorio = RelatorioAcessos()
-        return relatorio.gerar(self.buscar_todos())
\ No newline at end of file
+        return relatorio.gerar(dados)
\ No newline at end of file
@@ -0,0 +1,75 @@
+from itertools import islice
+
+class ResultadoImportacao:
+    """Quantidade de registros importados e erros por linha de uma importação"""
+
+    def __init__(self):
+        self.importados = 0
+        self.erros = []
+
+    def registrar(self, importados, erros):
+        self.importados += importados
+        self.erros.extend(erros)
+
+    def __str__(self):
+        linhas = [f"Importados: {self.importados} | Com erro: {len(self.erros)}"]
+        for numero, mensagem in sorted(self.erros):
+            linhas.append(f"Linha {numero}: {mensagem}")
+        return "\n".join(linhas)
+
+
+def _obrigatorio(linha, campo):
+    valor = linha.get(campo)
+    if valor is None or str(valor).strip() == "":
+        raise ValueError(f"Campo '{campo}' é obrigatório")
+    return str(valor).strip()
+
+def _inteiro(linha, campo):
+    valor = _obrigatorio(linha, campo)
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"Campo '{campo}' deve ser um número inteiro")
+    if numero < 0:
+        raise ValueError(f"Campo '{campo}' não pode ser negativo")
+    return numero
+
+def converter_livro(linha):
+    """Converte um dict (linha de CSV ou JSON) em (codigo, titulo, autor, ano, quantidade)"""
+    return (_obrigatorio(linha, "codigo"), _obrigatorio(linha, "titulo"), _obrigatorio(linha, "autor"),
+            _inteiro(linha, "ano"), _inteiro(linha, "quantidade"))
+
+def converter_usuario(linha):
+    """Converte um dict (linha de CSV ou JSON) em (login, senha, admin)"""
+    admin = linha.get("admin", False)
+    if not isinstance(admin, bool):
+        admin = str(admin).strip().lower() in ("1", "true", "sim", "s")
+    return _obrigatorio(linha, "login"), _obrigatorio(linha, "senha"), admin
+
+
+def importar(linhas, converter, gravar_lote, tamanho_lote=1000):
+    """Consome `linhas` em lotes: converte cada linha e grava as válidas com `gravar_lote`.
+
+    `gravar_lote` recebe uma lista de (numero, *campos) e retorna (importados, erros).
+    As linhas são numeradas a partir de 1 e lidas sob demanda, então o iterável
+    pode ser um arquivo de qualquer tamanho.
+    """
+    resultado = ResultadoImportacao()
+    numeradas = enumerate(linhas, 1)
+    while True:
+        lote = list(islice(numeradas, tamanho_lote))
+        if not lote:
+            return resultado
+
+        validas = []
+        for numero, linha in lote:
+            # Uma linha JSON válida pode não ser um objeto (ex.: [1, 2]); vira erro da linha, como as demais
+            if not isinstance(linha, dict):
+                resultado.erros.append((numero, "A linha deve ser um objeto com os campos do registro"))
+                continue
+            try:
+                validas.append((numero,) + converter(linha))
+            except ValueError as e:
+                resultado.erros.append((numero, str(e)))
+        if validas:
+            resultado.registrar(*gravar_lote(validas))
\ No newline at end of file
@@ -0,0 +1,85 @@
+import bisect
+import heapq
+import re
+import unicodedata
+
+class MotorBusca:
+    """Índice invertido sobre o título e o autor dos livros.
+
+    Os termos são normalizados (minúsculas, sem acentos) e mantidos também em
+    uma lista ordenada, o que permite encontrar palavras parciais por prefixo.
+    """
+
+    PESO_TITULO = 2
+    PESO_AUTOR = 1
+
+    def __init__(self):
+        self._postagens = {}
+        self._termos = []
+        self._documentos = {}
+
+    @staticmethod
+    def normalizar(texto):
+        """Divide o texto em termos sem acentos e em minúsculas"""
+        decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+        sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+        return re.findall(r"\w+", sem_acentos.lower())
+
+    def indexar(self, livro):
+        self.remover(livro.codigo)
+
+        pesos = {}
+        for termo in self.normalizar(livro.titulo):
+            pesos[termo] = pesos.get(termo, 0) + self.PESO_TITULO
+        for termo in self.normalizar(livro.autor):
+            pesos[termo] = pesos.get(termo, 0) + self.PESO_AUTOR
+
+        for termo, peso in pesos.items():
+            postagem = self._postagens.get(termo)
+            if postagem is None:
+                postagem = self._postagens[termo] = {}
+                bisect.insort(self._termos, termo)
+            postagem[livro.codigo] = peso
+        self._documentos[livro.codigo] = list(pesos)
+
+    def remover(self, codigo):
+        for termo in self._documentos.pop(codigo, []):
+            postagem = self._postagens[termo]
+            del postagem[codigo]
+            if not postagem:
+                del self._postagens[termo]
+                del self._termos[bisect.bisect_left(self._termos, termo)]
+
+    def _termos_com_prefixo(self, prefixo):
+        # Percorre por índice a partir do primeiro candidato: fatiar a lista copiaria todo o restante do vocabulário
+        for posicao in range(bisect.bisect_left(self._termos, prefixo), len(self._termos)):
+            termo = self._termos[posicao]
+            if not termo.startswith(prefixo):
+                break
+            yield termo
+
+    def pesquisar(self, consulta, limite=10):
+        """Retorna os códigos dos livros que contêm todos os termos da consulta, do mais relevante ao menos"""
+        termos_consulta = self.normalizar(consulta)
+        if not termos_consulta:
+            return []
+
+        pontuacao = None
+        for termo_consulta in termos_consulta:
+            encontrados = {}
+            for termo in self._termos_com_prefixo(termo_consulta):
+                # A palavra completa vale mais que uma palavra que apenas começa com o termo
+                bonus = 2 if termo == termo_consulta else 1
+                for codigo, peso in self._postagens[termo].items():
+                    encontrados[codigo] = max(encontrados.get(codigo, 0), peso * bonus)
+
+            if pontuacao is None:
+                pontuacao = encontrados
+            else:
+                pontuacao = {codigo: pontos + encontrados[codigo]
+                             for codigo, pontos in pontuacao.items() if codigo in encontrados}
+            if not pontuacao:
+                return []
+
+        melhores = heapq.nsmallest(limite, pontuacao.items(), key=lambda item: (-item[1], item[0]))
+        return [codigo for codigo, _ in melhores]
\ No newline at end of file
@@ -0,0 +1,173 @@
+import atexit
+import threading
+import time
+
+class TopK:
+    """Mantém as k chaves de maior contagem.
+
+    Como as contagens só aumentam, uma chave fora do top-k só pode entrar nele no
+    momento em que a sua própria contagem é incrementada; basta compará-la com a última.
+    """
+
+    def __init__(self, k):
+        self._k = k
+        self._chaves = []
+
+    def atualizar(self, chave, contagens):
+        if chave not in self._chaves:
+            if len(self._chaves) < self._k:
+                self._chaves.append(chave)
+            elif contagens[chave] > contagens[self._chaves[-1]]:
+                self._chaves[-1] = chave
+            else:
+                return
+        self._chaves.sort(key=lambda c: contagens[c], reverse=True)
+
+    def itens(self, contagens):
+        return [(chave, contagens[chave]) for chave in self._chaves]
+
+
+# Observer dos eventos de GerenciadorEmprestimos
+class EstatisticasEmprestimos:
+    """Contadores de empréstimos atualizados em memória a cada empréstimo e devolução.
+
+    Os contadores são gravados a cada `intervalo_persistencia` segundos (se mudaram)
+    e no encerramento. Enquanto há alterações não gravadas o estado salvo fica
+    marcado como em uso; se o processo parar sem gravá-lo, a próxima execução
+    o descarta e reconstrói os contadores a partir dos empréstimos.
+    """
+
+    CHAVE = "estatisticas_emprestimos"
+    CHAVE_EM_USO = "estatisticas_emprestimos_em_uso"
+
+    def __init__(self, metadados_dao, k=5, intervalo_persistencia=5.0):
+        self._metadados_dao = metadados_dao
+        self._k = k
+        self._trava = threading.Lock()
+        # Serializa as gravações, que são feitas fora de _trava
+        self._trava_persistencia = threading.Lock()
+        self._alterado = False
+        self._em_uso = False
+        self._zerar()
+
+        estado = metadados_dao.ler(self.CHAVE)
+        # Sem estado salvo, ou com um estado defasado, os contadores são reconstruídos na primeira consulta
+        self._pronto = estado is not None and not metadados_dao.ler(self.CHAVE_EM_USO, False)
+        if self._pronto:
+            self._total, self._ativos, self._devolvidos, self._por_usuario, self._por_livro = estado
+            for login in self._por_usuario:
+                self._top_usuarios.atualizar(login, self._por_usuario)
+            for codigo in self._por_livro:
+                self._top_livros.atualizar(codigo, self._por_livro)
+        if intervalo_persistencia is not None:
+            threading.Thread(target=self._persistir_periodicamente, args=(intervalo_persistencia,), daemon=True,
+                             name="persistencia-estatisticas").start()
+        atexit.register(self.persistir, True)
+
+    def _zerar(self):
+        self._total = 0
+        self._ativos = 0
+        self._devolvidos = 0
+        self._por_usuario = {}
+        self._por_livro = {}
+        self._top_usuarios = TopK(self._k)
+        self._top_livros = TopK(self._k)
+
+    @property
+    def pronto(self):
+        return self._pronto
+
+    def reconstruir(self, emprestimos):
+        with self._trava:
+            self._zerar()
+            for emprestimo in emprestimos:
+                self._contar(emprestimo)
+                if emprestimo.status != "Ativo":
+                    self._ativos -= 1
+                    self._devolvidos += 1
+            self._pronto = True
+            self._alterou()
+
+    def _contar(self, emprestimo):
+        self._total += 1
+        self._ativos += 1
+        self._por_usuario[emprestimo.login_usuario] = self._por_usuario.get(emprestimo.login_usuario, 0) + 1
+        self._por_livro[emprestimo.codigo_livro] = self._por_livro.get(emprestimo.codigo_livro, 0) + 1
+        self._top_usuarios.atualizar(emprestimo.login_usuario, self._por_usuario)
+        self._top_livros.atualizar(emprestimo.codigo_livro, self._por_livro)
+
+    def _alterou(self):
+        self._alterado = True
+        if not self._em_uso:
+            # Só a primeira alteração grava algo na hora: a marca de que o estado salvo ficou defasado
+            self._metadados_dao.gravar(self.CHAVE_EM_USO, True)
+            self._em_uso = True
+
+    def persistir(self, final=False):
+        """Grava os contadores se mudaram; com `final` (encerramento) o estado salvo volta a valer"""
+        with self._trava_persistencia:
+            with self._trava:
+                if not self._pronto or not (self._alterado or (final and self._em_uso)):
+                    return
+                # Cópias rasas: os eventos seguintes não esperam a gravação
+                estado = (self._total, self._ativos, self._devolvidos, dict(self._por_usuario), dict(self._por_livro))
+                self._alterado = False
+            try:
+                self._metadados_dao.gravar(self.CHAVE, estado)
+            except Exception:
+                with self._trava:
+                    self._alterado = True
+                raise
+            if final:
+                with self._trava:
+                    if not self._alterado:
+                        self._metadados_dao.gravar(self.CHAVE_EM_USO, False)
+                        self._em_uso = False
+
+    def _persistir_periodicamente(self, intervalo):
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.persistir()
+            except Exception:
+                pass  # tenta de novo no próximo intervalo
+
+    def emprestimo_realizado(self, emprestimo):
+        with self._trava:
+            if self._pronto:
+                self._contar(emprestimo)
+                self._alterou()
+
+    def emprestimo_devolvido(self, emprestimo):
+        with self._trava:
+            if self._pronto:
+                self._ativos -= 1
+                self._devolvidos += 1
+                self._alterou()
+
+    def emprestimos_realizados(self, emprestimos):
+        with self._trava:
+            if self._pronto:
+                for emprestimo in emprestimos:
+                    self._contar(emprestimo)
+                self._alterou()
+
+    def emprestimos_devolvidos(self, emprestimos):
+        with self._trava:
+            if self._pronto:
+                self._ativos -= len(emprestimos)
+                self._devolvidos += len(emprestimos)
+                self._alterou()
+
+    def resumo(self):
+        with self._trava:
+            return self._resumo()
+
+    def _resumo(self):
+        return {
+            "total": self._total,
+            "ativos": self._ativos,
+            "devolvidos": self._devolvidos,
+            "top_usuarios": self._top_usuarios.itens(self._por_usuario),
+            "top_livros": self._top_livros.itens(self._por_livro),
+        }
\ No newline at end of file
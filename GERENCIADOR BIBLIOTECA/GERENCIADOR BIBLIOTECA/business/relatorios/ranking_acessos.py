@@ -0,0 +1,69 @@
+import bisect
+
+class RankingAcessos:
+    """Ranking de usuários por número de acessos, mantido em baldes por contagem.
+
+    Cada acesso move o usuário do balde c para o balde c + 1, então o ranking
+    nunca precisa ser reordenado; os totais são mantidos a cada alteração.
+    """
+
+    def __init__(self):
+        self._acessos = {}
+        self._baldes = {}
+        self._contagens = []
+        self._total_acessos = 0
+
+    def _inserir_no_balde(self, login, contagem):
+        balde = self._baldes.get(contagem)
+        if balde is None:
+            balde = self._baldes[contagem] = {}
+            bisect.insort(self._contagens, contagem)
+        balde[login] = None
+
+    def _retirar_do_balde(self, login, contagem):
+        balde = self._baldes[contagem]
+        del balde[login]
+        if not balde:
+            del self._baldes[contagem]
+            del self._contagens[bisect.bisect_left(self._contagens, contagem)]
+
+    def definir(self, login, acessos):
+        self.remover(login)
+        self._acessos[login] = acessos
+        self._total_acessos += acessos
+        self._inserir_no_balde(login, acessos)
+
+    def incrementar(self, login):
+        """Soma um acesso ao usuário; um login que ainda não está no ranking entra com um acesso"""
+        atual = self._acessos.get(login)
+        if atual is None:
+            self.definir(login, 1)
+            return
+        self._retirar_do_balde(login, atual)
+        self._acessos[login] = atual + 1
+        self._total_acessos += 1
+        self._inserir_no_balde(login, atual + 1)
+
+    def remover(self, login):
+        if login in self._acessos:
+            acessos = self._acessos.pop(login)
+            self._total_acessos -= acessos
+            self._retirar_do_balde(login, acessos)
+
+    @property
+    def total_usuarios(self):
+        return len(self._acessos)
+
+    @property
+    def total_acessos(self):
+        return self._total_acessos
+
+    def top(self, n=None):
+        """Retorna até n pares (login, acessos), do maior para o menor número de acessos"""
+        resultado = []
+        for contagem in reversed(self._contagens):
+            for login in self._baldes[contagem]:
+                if n is not None and len(resultado) >= n:
+                    return resultado
+                resultado.append((login, contagem))
+        return resultado
\ No newline at end of file
@@ -4,16 +4,13 @@ class RelatorioAcessos(RelatorioTemplate):
     def _criar_cabecalho(self):
         return "=== RELATÓRIO DE ACESSOS DOS USUÁRIOS ==="
     
-    def _processar_dados(self, usuarios):
-        if not usuarios:
+    def _processar_dados(self, dados):
+        if not dados["total_usuarios"]:
             return "Nenhum usuário cadastrado."
         
-        # Ordenar usuários por número de acessos (decrescente)
-        usuarios_ordenados = sorted(usuarios, key=lambda u: u.acessos, reverse=True)
-        
-        # Calcular estatísticas
-        total_usuarios = len(usuarios)
-        total_acessos = sum(u.acessos for u in usuarios)
+        # O ranking já vem ordenado por número de acessos (decrescente), ver RankingAcessos
+        total_usuarios = dados["total_usuarios"]
+        total_acessos = dados["total_acessos"]
         media_acessos = total_acessos / total_usuarios if total_usuarios > 0 else 0
         
         resultado = []
@@ -22,7 +19,7 @@ class RelatorioAcessos(RelatorioTemplate):
         resultado.append(f"Média de acessos por usuário: {media_acessos:.2f}")
         resultado.append("\nDetalhamento de acessos por usuário:")
         
-        for i, usuario in enumerate(usuarios_ordenados, 1):
-            resultado.append(f"{i}. {usuario.login} - {usuario.acessos} acesso(s) - {'Admin' if usuario.admin else 'Usuário comum'}")
+        for i, (login, acessos, admin) in enumerate(dados["ranking"], 1):
+            resultado.append(f"{i}. {login} - {acessos} acesso(s) - {'Admin' if admin else 'Usuário comum'}")
         
         return "\n".join(resultado)
\ No newline at end of file
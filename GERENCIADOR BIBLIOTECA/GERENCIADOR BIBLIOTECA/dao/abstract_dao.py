@@ -1,22 +1,61 @@
+import heapq
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from itertools import islice
+from operator import attrgetter
 
 class AbstractDAO(ABC):
+    # Se transacao() desfaz de fato as gravações feitas dentro dela quando algo falha
+    transacional = False
+    
     @abstractmethod
     def salvar(self, obj):
         pass
     
+    def salvar_varios(self, objs):
+        """Salva vários objetos; os DAOs sobrescrevem para gravar tudo em uma única escrita"""
+        for obj in objs:
+            self.salvar(obj)
+        return objs
+    
     @abstractmethod
     def buscar(self, chave):
         pass
     
+    def buscar_varios(self, chaves):
+        """Busca várias chaves de uma vez; o resultado segue a ordem das chaves (None se ausente)"""
+        return [self.buscar(chave) for chave in chaves]
+    
     @abstractmethod
     def buscar_todos(self):
         pass
     
+    def iterar(self, tamanho_lote=100):
+        """Percorre os objetos lendo no máximo `tamanho_lote` por vez quando o armazenamento permite"""
+        yield from self.buscar_todos()
+    
+    def buscar_pagina(self, offset=0, limite=20, ordem=None):
+        """Retorna uma página de objetos; `ordem` é o nome de um atributo (prefixo '-' para decrescente)"""
+        objetos = self.iterar()
+        if ordem is None:
+            return list(islice(objetos, offset, offset + limite))
+        
+        # Seleciona só os offset + limite primeiros em vez de ordenar tudo
+        selecionar = heapq.nlargest if ordem.startswith("-") else heapq.nsmallest
+        return selecionar(offset + limite, objetos, key=attrgetter(ordem.lstrip("-")))[offset:]
+    
     @abstractmethod
     def atualizar(self, obj):
         pass
     
+    def atualizar_varios(self, objs):
+        """Atualiza vários objetos; os DAOs sobrescrevem para gravar tudo em uma única escrita"""
+        return [self.atualizar(obj) for obj in objs]
+    
     @abstractmethod
     def deletar(self, chave):
-        pass
\ No newline at end of file
+        pass
+    
+    def transacao(self):
+        """Contexto que torna atômicas as gravações feitas dentro dele, quando o armazenamento permite"""
+        return nullcontext()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import heapq
+import mmap
+import os
+import struct
+import threading
+from util.metricas import registrar_io
+
+class ArquivoRegistros:
+    """Arquivo de registros de tamanho fixo mapeado em memória.
+
+    Cada registro começa com um byte de estado (1 = ocupado, 0 = livre) seguido
+    dos campos descritos por `formato` (sintaxe do módulo struct). Como todo
+    registro tem o mesmo tamanho, alterar um registro ou um único campo é uma
+    escrita no lugar, sem regravar o arquivo. Registros livres são reaproveitados.
+    """
+
+    MAGIA = b"SGBR"
+    VERSAO = 1
+    CABECALHO = struct.Struct("<4sHI")
+    _ESTADO = struct.Struct("<B")
+
+    def __init__(self, caminho, formato, capacidade_inicial=1024, sincronizar=False):
+        self._caminho = caminho
+        self._registro = struct.Struct("<B" + formato.lstrip("<"))
+        self._sincronizar = sincronizar
+        self._trava = threading.RLock()
+
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) == 0
+        self._arquivo = open(caminho, "r+b" if not novo else "w+b")
+        if novo:
+            self._arquivo.write(self.CABECALHO.pack(self.MAGIA, self.VERSAO, self._registro.size))
+            self._arquivo.truncate(self.CABECALHO.size + capacidade_inicial * self._registro.size)
+            self._arquivo.flush()
+        self._mapa = mmap.mmap(self._arquivo.fileno(), 0)
+
+        magia, versao, tamanho = self.CABECALHO.unpack_from(self._mapa, 0)
+        if magia != self.MAGIA or versao != self.VERSAO or tamanho != self._registro.size:
+            self.fechar()
+            raise ValueError(f"'{caminho}' não é um arquivo de registros compatível")
+
+        # Heap das posições livres: novos registros ocupam sempre a menor
+        self._livres = [posicao for posicao in self._posicoes() if not self.ocupado(posicao)]
+
+    def _capacidade(self):
+        return (len(self._mapa) - self.CABECALHO.size) // self._registro.size
+
+    def _posicoes(self):
+        return range(self.CABECALHO.size, self.CABECALHO.size + self._capacidade() * self._registro.size,
+                     self._registro.size)
+
+    def ocupado(self, posicao):
+        return self._mapa[posicao] == 1
+
+    def registros(self):
+        """Percorre (posição, campos) dos registros ocupados"""
+        with self._trava:
+            for posicao in self._posicoes():
+                if self.ocupado(posicao):
+                    yield posicao, self._registro.unpack_from(self._mapa, posicao)[1:]
+
+    def ler(self, posicao):
+        # unpack_from lê direto do mapa, sem copiar o registro
+        with self._trava:
+            registrar_io(bytes_lidos=self._registro.size)
+            return self._registro.unpack_from(self._mapa, posicao)[1:]
+
+    def gravar(self, posicao, campos):
+        with self._trava:
+            self._registro.pack_into(self._mapa, posicao, 1, *campos)
+            self._sincronizar_trecho(posicao, self._registro.size)
+            registrar_io(bytes_escritos=self._registro.size)
+
+    def gravar_campo(self, posicao, deslocamento, formato, valor):
+        """Grava um único campo, `deslocamento` bytes após o início dos campos do registro"""
+        with self._trava:
+            inicio = posicao + self._ESTADO.size + deslocamento
+            struct.pack_into(formato, self._mapa, inicio, valor)
+            self._sincronizar_trecho(inicio, struct.calcsize(formato))
+            registrar_io(bytes_escritos=struct.calcsize(formato))
+
+    def alocar(self):
+        with self._trava:
+            if not self._livres:
+                self._crescer()
+            return heapq.heappop(self._livres)
+
+    def liberar(self, posicao):
+        with self._trava:
+            self._ESTADO.pack_into(self._mapa, posicao, 0)
+            self._sincronizar_trecho(posicao, self._ESTADO.size)
+            heapq.heappush(self._livres, posicao)
+
+    def _crescer(self):
+        # Dobra a capacidade; o mapa é refeito porque nem todo sistema permite redimensioná-lo no lugar
+        capacidade = self._capacidade()
+        self._mapa.close()
+        self._arquivo.truncate(self.CABECALHO.size + 2 * capacidade * self._registro.size)
+        self._mapa = mmap.mmap(self._arquivo.fileno(), 0)
+        novas = range(self.CABECALHO.size + capacidade * self._registro.size,
+                      self.CABECALHO.size + 2 * capacidade * self._registro.size, self._registro.size)
+        self._livres.extend(novas)
+        heapq.heapify(self._livres)
+
+    def _sincronizar_trecho(self, inicio, tamanho):
+        if self._sincronizar:
+            # msync exige início alinhado à granularidade de alocação
+            alinhado = inicio - inicio % mmap.ALLOCATIONGRANULARITY
+            self._mapa.flush(alinhado, inicio + tamanho - alinhado)
+
+    def sincronizar(self):
+        with self._trava:
+            if not self._mapa.closed:
+                self._mapa.flush()
+
+    def fechar(self):
+        with self._trava:
+            if not self._mapa.closed:
+                self._mapa.flush()
+                self._mapa.close()
+            self._arquivo.close()
\ No newline at end of file
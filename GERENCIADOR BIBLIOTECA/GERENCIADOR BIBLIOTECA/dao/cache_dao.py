@@ -0,0 +1,233 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dao.abstract_dao import AbstractDAO
+
+# Preferência da thread atual para a gravação em grupo (ver aguardar_gravacao)
+_preferencia = threading.local()
+
+@contextmanager
+def aguardar_gravacao(aguardar):
+    """Escolhe, para as alterações feitas dentro do contexto, entre esperar a gravação em grupo
+    chegar ao arquivo (aguardar=True) ou retornar logo (aguardar=False)"""
+    anterior = getattr(_preferencia, "aguardar", None)
+    _preferencia.aguardar = aguardar
+    try:
+        yield
+    finally:
+        _preferencia.aguardar = anterior
+
+
+class _Espera:
+    """Uma alteração aguardando a gravação em grupo; `erro` fica preenchido se ela foi descartada"""
+
+    __slots__ = ("alteracao", "concluida", "erro")
+
+    def __init__(self, alteracao):
+        self.alteracao = alteracao
+        self.concluida = False
+        self.erro = None
+
+# Decorator para os DAOs em arquivo
+class DAOCache(AbstractDAO):
+    """Mantém o dict decodificado de um DAO em arquivo residente em memória.
+
+    Alterações feitas por outro processo são detectadas pelo mtime/tamanho do
+    arquivo. Com escrita adiada (write-back) as alterações são acumuladas e
+    gravadas de uma vez a cada `limite_pendentes` operações ou em descarregar().
+
+    Com `janela_ms` (gravação em grupo) uma thread grava as alterações acumuladas
+    quando a janela fecha ou quando chegam a `limite_pendentes`, em uma única
+    escrita. Quem altera espera essa gravação se `aguardar_gravacao` (durável ao
+    retornar) ou retorna logo, aceitando perder no máximo uma janela numa queda.
+
+    Em qualquer modo, se a gravação falha as alterações não gravadas são
+    descartadas da memória e o erro é propagado (na gravação em grupo, a quem
+    as esperava): nada do que falhou é gravado depois.
+    """
+
+    def __init__(self, dao, escrita_adiada=False, limite_pendentes=100, janela_ms=None, aguardar_gravacao=True):
+        self._dao = dao
+        self._escrita_adiada = escrita_adiada
+        self._limite_pendentes = limite_pendentes
+        self._janela = janela_ms / 1000 if janela_ms is not None else None
+        self._aguardar_gravacao = aguardar_gravacao
+        self._dados = None
+        self._assinatura = None
+        self._pendentes = 0
+        self._trava = threading.RLock()
+        # Gravação em grupo: uma gravação por vez, e durante ela as alterações seguintes
+        # continuam em memória. As alterações são numeradas; quem espera fica em _esperas, em ordem.
+        self._condicao = threading.Condition(self._trava)
+        self._trava_gravacao = threading.Lock()
+        self._gravando = False
+        self._alteracoes = 0
+        self._esperas = deque()
+        self._inicio_janela = None
+        if self._janela is not None:
+            threading.Thread(target=self._gravar_em_grupo, daemon=True, name="gravacao-em-grupo").start()
+        if escrita_adiada or self._janela is not None:
+            atexit.register(self.descarregar)
+
+    def _assinatura_arquivo(self):
+        try:
+            info = os.stat(self._dao._arquivo)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _obter_dados(self):
+        # Com alterações pendentes ou em gravação a cópia em memória é a mais recente
+        if self._dados is None or (not self._pendentes and not self._gravando
+                                   and self._assinatura_arquivo() != self._assinatura):
+            self._dados = self._dao._carregar()
+            self._assinatura = self._assinatura_arquivo()
+        return self._dados
+
+    def _registrar_alteracao(self):
+        self._pendentes += 1
+        self._alteracoes += 1
+        if self._janela is None:
+            if not self._escrita_adiada or self._pendentes >= self._limite_pendentes:
+                self.descarregar()
+            return
+
+        if self._pendentes == 1:
+            self._inicio_janela = time.monotonic()
+        self._condicao.notify_all()
+        aguardar = getattr(_preferencia, "aguardar", None)
+        if aguardar if aguardar is not None else self._aguardar_gravacao:
+            espera = _Espera(self._alteracoes)
+            self._esperas.append(espera)
+            while not espera.concluida:
+                self._condicao.wait()
+            if espera.erro is not None:
+                raise espera.erro
+
+    def _gravar_em_grupo(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes:
+                    self._condicao.wait()
+                # Espera a janela fechar ou o grupo encher
+                while self._pendentes < self._limite_pendentes:
+                    restante = self._inicio_janela + self._janela - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicao.wait(restante)
+            try:
+                self.descarregar()
+            except Exception:
+                pass  # o erro já foi entregue a quem esperava e as alterações, descartadas
+
+    def descarregar(self):
+        """Grava no arquivo as alterações pendentes"""
+        if self._janela is None:
+            with self._trava:
+                if self._pendentes and self._dados is not None:
+                    try:
+                        self._dao._salvar_todos(self._dados)
+                    except Exception:
+                        # Como na gravação em grupo: o que não chegou ao arquivo é descartado
+                        # e a próxima leitura recarrega o arquivo
+                        self._dados = None
+                        self._pendentes = 0
+                        raise
+                    self._assinatura = self._assinatura_arquivo()
+                    self._pendentes = 0
+            return
+
+        with self._trava_gravacao:
+            with self._trava:
+                if not self._pendentes or self._dados is None:
+                    return
+                # Cópia rasa: as alterações seguintes não esperam a gravação terminar
+                dados = dict(self._dados)
+                alteracoes = self._alteracoes
+                self._pendentes = 0
+                self._gravando = True
+            try:
+                self._dao._salvar_todos(dados)
+            except Exception as e:
+                with self._condicao:
+                    # Descarta tudo o que não está no arquivo, inclusive o que chegou durante
+                    # a gravação: a próxima leitura recarrega o arquivo
+                    self._gravando = False
+                    self._dados = None
+                    self._pendentes = 0
+                    while self._esperas:
+                        espera = self._esperas.popleft()
+                        espera.erro = e
+                        espera.concluida = True
+                    self._condicao.notify_all()
+                raise
+            with self._condicao:
+                self._gravando = False
+                self._assinatura = self._assinatura_arquivo()
+                while self._esperas and self._esperas[0].alteracao <= alteracoes:
+                    self._esperas.popleft().concluida = True
+                self._condicao.notify_all()
+
+    def salvar(self, obj):
+        with self._trava:
+            self._obter_dados()[self._dao._chave(obj)] = obj
+            self._registrar_alteracao()
+        return obj
+
+    def salvar_varios(self, objs):
+        with self._trava:
+            dados = self._obter_dados()
+            for obj in objs:
+                dados[self._dao._chave(obj)] = obj
+            self._registrar_alteracao()
+        return objs
+
+    def buscar(self, chave):
+        with self._trava:
+            return self._obter_dados().get(chave)
+
+    def buscar_varios(self, chaves):
+        with self._trava:
+            dados = self._obter_dados()
+            return [dados.get(chave) for chave in chaves]
+
+    def buscar_todos(self):
+        with self._trava:
+            return list(self._obter_dados().values())
+
+    def atualizar(self, obj):
+        with self._trava:
+            dados = self._obter_dados()
+            chave = self._dao._chave(obj)
+            if chave in dados:
+                dados[chave] = obj
+                self._registrar_alteracao()
+                return obj
+        return None
+
+    def atualizar_varios(self, objs):
+        with self._trava:
+            dados = self._obter_dados()
+            atualizados = []
+            for obj in objs:
+                chave = self._dao._chave(obj)
+                if chave in dados:
+                    dados[chave] = obj
+                    atualizados.append(obj)
+                else:
+                    atualizados.append(None)
+            if any(obj is not None for obj in atualizados):
+                self._registrar_alteracao()
+        return atualizados
+
+    def deletar(self, chave):
+        with self._trava:
+            dados = self._obter_dados()
+            if chave in dados:
+                del dados[chave]
+                self._registrar_alteracao()
+                return True
+        return False
\ No newline at end of file
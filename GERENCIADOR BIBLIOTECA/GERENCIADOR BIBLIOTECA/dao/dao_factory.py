@@ -1,14 +1,30 @@
-from dao.usuario_dao import UsuarioDAOMemoria, UsuarioDAOArquivo
-from dao.livro_dao import LivroDAOMemoria, LivroDAOArquivo
-from dao.emprestimo_dao import EmprestimoDAOMemoria, EmprestimoDAOArquivo
+from dao.usuario_dao import UsuarioDAOMemoria, UsuarioDAOArquivo, UsuarioDAOJournal, UsuarioDAOSQLite
+from dao.livro_dao import LivroDAOMemoria, LivroDAOArquivo, LivroDAOJournal, LivroDAOMmap, LivroDAOSQLite
+from dao.emprestimo_dao import EmprestimoDAOMemoria, EmprestimoDAOArquivo, EmprestimoDAOJournal, EmprestimoDAOSQLite
+from dao.metadados_dao import MetadadosDAOMemoria, MetadadosDAOArquivo, MetadadosDAOSQLite
+from dao.cache_dao import DAOCache
+from dao.sqlite import BancoSQLite
 
 class DAOFactory:
     @staticmethod
-    def get_factory(tipo):
+    def get_factory(tipo, cache=None, janela_ms=5, aguardar_gravacao=True):
+        """`cache` pode ser "write-through", "write-back" ou "group-commit"; os dois últimos
+        parâmetros valem para a gravação em grupo"""
+        if cache not in (None, "write-through", "write-back", "group-commit"):
+            raise ValueError("Modo de cache inválido")
+        if cache and tipo.lower() != "arquivo":
+            raise ValueError("Cache disponível apenas para armazenamento em arquivo")
+        
         if tipo.lower() == "memoria":
             return MemoriaDAOFactory()
         elif tipo.lower() == "arquivo":
-            return ArquivoDAOFactory()
+            return ArquivoDAOFactory(cache, janela_ms, aguardar_gravacao)
+        elif tipo.lower() == "journal":
+            return JournalDAOFactory()
+        elif tipo.lower() == "mmap":
+            return MmapDAOFactory()
+        elif tipo.lower() == "sqlite":
+            return SQLiteDAOFactory()
         else:
             raise ValueError("Tipo de armazenamento inválido")
 
@@ -21,13 +37,65 @@ class MemoriaDAOFactory:
     
     def criar_emprestimo_dao(self):
         return EmprestimoDAOMemoria()
+    
+    def criar_metadados_dao(self):
+        return MetadadosDAOMemoria()
 
 class ArquivoDAOFactory:
+    def __init__(self, cache=None, janela_ms=5, aguardar_gravacao=True):
+        self._cache = cache
+        self._janela_ms = janela_ms
+        self._aguardar_gravacao = aguardar_gravacao
+    
+    def _decorar(self, dao):
+        if self._cache is None:
+            return dao
+        if self._cache == "group-commit":
+            return DAOCache(dao, janela_ms=self._janela_ms, aguardar_gravacao=self._aguardar_gravacao)
+        return DAOCache(dao, escrita_adiada=self._cache == "write-back")
+    
     def criar_usuario_dao(self):
-        return UsuarioDAOArquivo()
+        return self._decorar(UsuarioDAOArquivo())
     
     def criar_livro_dao(self):
-        return LivroDAOArquivo()
+        return self._decorar(LivroDAOArquivo())
     
     def criar_emprestimo_dao(self):
-        return EmprestimoDAOArquivo()
\ No newline at end of file
+        return self._decorar(EmprestimoDAOArquivo())
+    
+    def criar_metadados_dao(self):
+        return MetadadosDAOArquivo()
+
+class JournalDAOFactory:
+    def criar_usuario_dao(self):
+        return UsuarioDAOJournal()
+    
+    def criar_livro_dao(self):
+        return LivroDAOJournal()
+    
+    def criar_emprestimo_dao(self):
+        return EmprestimoDAOJournal()
+    
+    def criar_metadados_dao(self):
+        return MetadadosDAOArquivo()
+
+# Catálogo mapeado em memória; usuários e empréstimos ficam no journal
+class MmapDAOFactory(JournalDAOFactory):
+    def criar_livro_dao(self):
+        return LivroDAOMmap()
+
+class SQLiteDAOFactory:
+    def __init__(self, arquivo="biblioteca.db"):
+        self._banco = BancoSQLite(arquivo)
+    
+    def criar_usuario_dao(self):
+        return UsuarioDAOSQLite(self._banco)
+    
+    def criar_livro_dao(self):
+        return LivroDAOSQLite(self._banco)
+    
+    def criar_emprestimo_dao(self):
+        return EmprestimoDAOSQLite(self._banco)
+    
+    def criar_metadados_dao(self):
+        return MetadadosDAOSQLite(self._banco)
\ No newline at end of file
@@ -1,6 +1,15 @@
 import pickle
 import os
+import threading
+import time
+from datetime import datetime
 from dao.abstract_dao import AbstractDAO
+from dao.journal_dao import JournalDAO
+from dao.sqlite import DAOSQLite
+from dao import unidade_trabalho
+from models.emprestimo import Emprestimo
+from util.exceptions import ArquivoCorrompido
+from util.metricas import registrar_io
 
 class EmprestimoDAOMemoria(AbstractDAO):
     def __init__(self):
@@ -29,49 +38,154 @@ class EmprestimoDAOMemoria(AbstractDAO):
         return False
 
 class EmprestimoDAOArquivo(AbstractDAO):
+    transacional = True
+    
     def __init__(self):
         self._arquivo = "emprestimos.dat"
+        # Serializa o ciclo carregar/alterar/gravar entre threads
+        self._trava = threading.RLock()
+        unidade_trabalho.recuperar()
         if not os.path.exists(self._arquivo):
-            with open(self._arquivo, 'wb') as f:
-                pickle.dump({}, f)
+            unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps({}))
     
     def _carregar(self):
+        # Dentro de uma unidade de trabalho valem as alterações ainda não confirmadas
+        unidade = unidade_trabalho.unidade_atual()
+        if unidade is not None and unidade.dados(self._arquivo) is not None:
+            return unidade.dados(self._arquivo)
+        # Leituras dispensam a trava: o arquivo só é trocado inteiro, nunca fica pela metade
+        inicio = time.perf_counter()
         try:
             with open(self._arquivo, 'rb') as f:
-                return pickle.load(f)
-        except:
+                emprestimos = pickle.load(f)
+                registrar_io(bytes_lidos=f.tell(), carregamentos=1, segundos=time.perf_counter() - inicio)
+                return emprestimos
+        except FileNotFoundError:
             return {}
+        except Exception as e:
+            raise ArquivoCorrompido(f"Não foi possível ler '{self._arquivo}': {e}") from e
     
     def _salvar_todos(self, emprestimos):
-        with open(self._arquivo, 'wb') as f:
-            pickle.dump(emprestimos, f)
+        with self._trava:
+            unidade = unidade_trabalho.unidade_atual()
+            if unidade is not None:
+                unidade.participar(self._arquivo, self._trava, emprestimos)
+            else:
+                unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps(emprestimos))
+    
+    def transacao(self):
+        """Unidade de trabalho: as gravações dos DAOs em arquivo dentro dela são confirmadas juntas"""
+        return unidade_trabalho.transacao()
+    
+    def _chave(self, emprestimo):
+        return emprestimo.codigo
     
     def salvar(self, emprestimo):
-        emprestimos = self._carregar()
-        emprestimos[emprestimo.codigo] = emprestimo
-        self._salvar_todos(emprestimos)
-        return emprestimo
+        with self._trava:
+            emprestimos = self._carregar()
+            emprestimos[emprestimo.codigo] = emprestimo
+            self._salvar_todos(emprestimos)
+            return emprestimo
+    
+    def salvar_varios(self, emprestimos_novos):
+        with self._trava:
+            emprestimos = self._carregar()
+            for emprestimo in emprestimos_novos:
+                emprestimos[self._chave(emprestimo)] = emprestimo
+            self._salvar_todos(emprestimos)
+            return emprestimos_novos
     
     def buscar(self, codigo):
         emprestimos = self._carregar()
         return emprestimos.get(codigo)
     
+    def buscar_varios(self, chaves):
+        emprestimos = self._carregar()
+        return [emprestimos.get(chave) for chave in chaves]
+    
     def buscar_todos(self):
         emprestimos = self._carregar()
         return list(emprestimos.values())
     
     def atualizar(self, emprestimo):
-        emprestimos = self._carregar()
-        if emprestimo.codigo in emprestimos:
-            emprestimos[emprestimo.codigo] = emprestimo
+        with self._trava:
+            emprestimos = self._carregar()
+            if emprestimo.codigo in emprestimos:
+                emprestimos[emprestimo.codigo] = emprestimo
+                self._salvar_todos(emprestimos)
+                return emprestimo
+            return None
+    
+    def atualizar_varios(self, emprestimos_alterados):
+        with self._trava:
+            emprestimos = self._carregar()
+            atualizados = []
+            for emprestimo in emprestimos_alterados:
+                chave = self._chave(emprestimo)
+                if chave in emprestimos:
+                    emprestimos[chave] = emprestimo
+                    atualizados.append(emprestimo)
+                else:
+                    atualizados.append(None)
             self._salvar_todos(emprestimos)
-            return emprestimo
-        return None
+            return atualizados
     
     def deletar(self, codigo):
-        emprestimos = self._carregar()
-        if codigo in emprestimos:
-            del emprestimos[codigo]
-            self._salvar_todos(emprestimos)
-            return True
-        return False
\ No newline at end of file
+        with self._trava:
+            emprestimos = self._carregar()
+            if codigo in emprestimos:
+                del emprestimos[codigo]
+                self._salvar_todos(emprestimos)
+                return True
+            return False
+
+class EmprestimoDAOJournal(JournalDAO):
+    def __init__(self, limite_compactacao=1000, compactacao_em_segundo_plano=True):
+        super().__init__("emprestimos.dat", limite_compactacao, compactacao_em_segundo_plano)
+    
+    def _chave(self, emprestimo):
+        return emprestimo.codigo
+
+class EmprestimoDAOSQLite(DAOSQLite):
+    _TABELA = "emprestimos"
+    _CHAVE = "codigo"
+    _COLUNAS = ("codigo", "login_usuario", "codigo_livro", "data_emprestimo", "data_devolucao_prevista",
+                "data_devolucao_real", "status")
+    
+    def _de_linha(self, linha):
+        codigo, login_usuario, codigo_livro, data_emprestimo, data_devolucao_prevista, data_devolucao_real, status = linha
+        return Emprestimo.de_referencias(
+            codigo, login_usuario, codigo_livro,
+            datetime.fromisoformat(data_emprestimo),
+            datetime.fromisoformat(data_devolucao_prevista),
+            datetime.fromisoformat(data_devolucao_real) if data_devolucao_real else None,
+            status)
+    
+    def _parametros(self, emprestimo):
+        return (emprestimo.login_usuario, emprestimo.codigo_livro,
+                emprestimo.data_emprestimo.isoformat(), emprestimo.data_devolucao_prevista.isoformat(),
+                emprestimo.data_devolucao_real.isoformat() if emprestimo.data_devolucao_real else None,
+                emprestimo.status, emprestimo.codigo)
+    
+    def salvar(self, emprestimo):
+        self._banco.executar(
+            "INSERT OR REPLACE INTO emprestimos (login_usuario, codigo_livro, data_emprestimo, data_devolucao_prevista, "
+            "data_devolucao_real, status, codigo) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._parametros(emprestimo))
+        return emprestimo
+    
+    def buscar_por_usuario(self, login_usuario):
+        return self._de_linhas(self._banco.consultar(self._consulta + " WHERE login_usuario = ?", (login_usuario,)))
+    
+    def buscar_por_livro(self, codigo_livro):
+        return self._de_linhas(self._banco.consultar(self._consulta + " WHERE codigo_livro = ?", (codigo_livro,)))
+    
+    def buscar_ativos(self):
+        return self._de_linhas(self._banco.consultar(self._consulta + " WHERE status = 'Ativo'"))
+    
+    def atualizar(self, emprestimo):
+        alterados = self._banco.executar(
+            "UPDATE emprestimos SET login_usuario = ?, codigo_livro = ?, data_emprestimo = ?, "
+            "data_devolucao_prevista = ?, data_devolucao_real = ?, status = ? WHERE codigo = ?",
+            self._parametros(emprestimo))
+        return emprestimo if alterados else None
\ No newline at end of file
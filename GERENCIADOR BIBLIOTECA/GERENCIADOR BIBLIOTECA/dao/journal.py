@@ -0,0 +1,117 @@
+import os
+import pickle
+import threading
+import time
+from util.metricas import registrar_io
+
+class Journal:
+    """Log de escrita antecipada (write-ahead log) com snapshot e compactação"""
+
+    def __init__(self, arquivo, limite_compactacao=1000, compactacao_em_segundo_plano=True, sincronizar=True):
+        # O snapshot usa o mesmo formato dos DAOs em arquivo (um dict serializado com pickle)
+        self._arquivo = arquivo
+        self._arquivo_log = arquivo + ".log"
+        self._arquivo_log_congelado = arquivo + ".log.1"
+        self._limite_compactacao = limite_compactacao
+        self._em_segundo_plano = compactacao_em_segundo_plano
+        self._sincronizar = sincronizar
+        self._registros_no_log = 0
+        self._trava = threading.Lock()
+        self._compactacao = None
+        self._log = None
+
+    def carregar(self):
+        """Lê o snapshot e reaplica as operações registradas no log"""
+        dados = {}
+        if os.path.exists(self._arquivo):
+            with open(self._arquivo, 'rb') as f:
+                dados = pickle.load(f)
+
+        # Um log congelado só existe se o processo parou durante uma compactação
+        if os.path.exists(self._arquivo_log_congelado):
+            self._reaplicar(self._arquivo_log_congelado, dados)
+            self._gravar_snapshot(dict(dados))
+
+        self._registros_no_log = self._reaplicar(self._arquivo_log, dados) if os.path.exists(self._arquivo_log) else 0
+        self._log = open(self._arquivo_log, 'ab')
+        return dados
+
+    def _reaplicar(self, caminho, dados):
+        registros = 0
+        with open(caminho, 'r+b') as f:
+            posicao_valida = 0
+            while True:
+                try:
+                    operacao, chave, obj = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError, ValueError):
+                    break
+
+                if operacao == "salvar":
+                    dados[chave] = obj
+                elif operacao == "deletar":
+                    dados.pop(chave, None)
+
+                registros += 1
+                posicao_valida = f.tell()
+
+            # Descarta um registro incompleto deixado por uma escrita interrompida
+            f.truncate(posicao_valida)
+        return registros
+
+    def registrar(self, operacao, chave, obj=None):
+        """Acrescenta uma operação ao final do log"""
+        self.registrar_varios([(operacao, chave, obj)])
+
+    def registrar_varios(self, operacoes):
+        """Acrescenta várias operações (operacao, chave, obj) com uma única sincronização"""
+        dados = b"".join(pickle.dumps(operacao) for operacao in operacoes)
+        with self._trava:
+            inicio = time.perf_counter()
+            self._log.write(dados)
+            self._log.flush()
+            if self._sincronizar:
+                os.fsync(self._log.fileno())
+            self._registros_no_log += len(operacoes)
+            registrar_io(bytes_escritos=len(dados), segundos=time.perf_counter() - inicio)
+
+    def precisa_compactar(self):
+        return self._registros_no_log >= self._limite_compactacao and not self.compactando()
+
+    def compactando(self):
+        return self._compactacao is not None and self._compactacao.is_alive()
+
+    def compactar(self, dados, aguardar=False):
+        """Incorpora o log ao snapshot. Recebe o estado atual completo do DAO."""
+        with self._trava:
+            if self.compactando():
+                self._compactacao.join()
+
+            # Congela o log atual; novas operações passam a ir para um log vazio
+            self._log.close()
+            os.replace(self._arquivo_log, self._arquivo_log_congelado)
+            self._log = open(self._arquivo_log, 'ab')
+            self._registros_no_log = 0
+            copia = dict(dados)
+
+            if self._em_segundo_plano and not aguardar:
+                self._compactacao = threading.Thread(target=self._gravar_snapshot, args=(copia,), daemon=True)
+                self._compactacao.start()
+            else:
+                self._gravar_snapshot(copia)
+
+    def _gravar_snapshot(self, dados):
+        temporario = self._arquivo + ".tmp"
+        with open(temporario, 'wb') as f:
+            pickle.dump(dados, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self._arquivo)
+        os.remove(self._arquivo_log_congelado)
+
+    def fechar(self, dados):
+        """Compacta o log de forma síncrona e libera o arquivo"""
+        if self._log is None:
+            return
+        self.compactar(dados, aguardar=True)
+        self._log.close()
+        self._log = None
\ No newline at end of file
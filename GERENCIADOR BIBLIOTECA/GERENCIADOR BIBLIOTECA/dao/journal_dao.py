@@ -0,0 +1,96 @@
+import atexit
+import threading
+from abc import abstractmethod
+from dao.abstract_dao import AbstractDAO
+from dao.journal import Journal
+
+class JournalDAO(AbstractDAO):
+    """DAO em arquivo que grava apenas o registro alterado a cada operação.
+
+    Os dados ficam residentes em memória; o arquivo .dat passa a ser um snapshot
+    que é atualizado pela compactação do log.
+    """
+
+    def __init__(self, arquivo, limite_compactacao=1000, compactacao_em_segundo_plano=True):
+        self._journal = Journal(arquivo, limite_compactacao, compactacao_em_segundo_plano)
+        self._dados = self._journal.carregar()
+        self._trava = threading.Lock()
+        # Ao encerrar, o log é incorporado ao snapshot para que o .dat fique completo
+        atexit.register(self.fechar)
+
+    @abstractmethod
+    def _chave(self, obj):
+        pass
+
+    def _registrar(self, operacao, chave, obj=None):
+        self._journal.registrar(operacao, chave, obj)
+        if self._journal.precisa_compactar():
+            self._journal.compactar(self._dados)
+
+    def salvar(self, obj):
+        with self._trava:
+            chave = self._chave(obj)
+            self._dados[chave] = obj
+            self._registrar("salvar", chave, obj)
+        return obj
+
+    def salvar_varios(self, objs):
+        with self._trava:
+            operacoes = []
+            for obj in objs:
+                chave = self._chave(obj)
+                self._dados[chave] = obj
+                operacoes.append(("salvar", chave, obj))
+            self._journal.registrar_varios(operacoes)
+            if self._journal.precisa_compactar():
+                self._journal.compactar(self._dados)
+        return objs
+    
+    def buscar(self, chave):
+        return self._dados.get(chave)
+
+    def buscar_todos(self):
+        return list(self._dados.values())
+
+    def atualizar(self, obj):
+        with self._trava:
+            chave = self._chave(obj)
+            if chave in self._dados:
+                self._dados[chave] = obj
+                self._registrar("salvar", chave, obj)
+                return obj
+        return None
+
+    def atualizar_varios(self, objs):
+        with self._trava:
+            atualizados = []
+            operacoes = []
+            for obj in objs:
+                chave = self._chave(obj)
+                if chave in self._dados:
+                    self._dados[chave] = obj
+                    operacoes.append(("salvar", chave, obj))
+                    atualizados.append(obj)
+                else:
+                    atualizados.append(None)
+            if operacoes:
+                self._journal.registrar_varios(operacoes)
+                if self._journal.precisa_compactar():
+                    self._journal.compactar(self._dados)
+        return atualizados
+    
+    def deletar(self, chave):
+        with self._trava:
+            if chave in self._dados:
+                del self._dados[chave]
+                self._registrar("deletar", chave)
+                return True
+        return False
+
+    def compactar(self):
+        with self._trava:
+            self._journal.compactar(self._dados, aguardar=True)
+
+    def fechar(self):
+        with self._trava:
+            self._journal.fechar(self._dados)
\ No newline at end of file
@@ -1,6 +1,16 @@
+import atexit
 import pickle
 import os
+import threading
+import time
 from dao.abstract_dao import AbstractDAO
+from dao.arquivo_mmap import ArquivoRegistros
+from dao.journal_dao import JournalDAO
+from dao.sqlite import DAOSQLite
+from dao import unidade_trabalho
+from models.livro import Livro
+from util.exceptions import ArquivoCorrompido
+from util.metricas import registrar_io
 
 class LivroDAOMemoria(AbstractDAO):
     def __init__(self):
@@ -29,49 +39,260 @@ class LivroDAOMemoria(AbstractDAO):
         return False
 
 class LivroDAOArquivo(AbstractDAO):
+    transacional = True
+    
     def __init__(self):
         self._arquivo = "livros.dat"
+        # Serializa o ciclo carregar/alterar/gravar entre threads
+        self._trava = threading.RLock()
+        unidade_trabalho.recuperar()
         if not os.path.exists(self._arquivo):
-            with open(self._arquivo, 'wb') as f:
-                pickle.dump({}, f)
+            unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps({}))
     
     def _carregar(self):
+        # Dentro de uma unidade de trabalho valem as alterações ainda não confirmadas
+        unidade = unidade_trabalho.unidade_atual()
+        if unidade is not None and unidade.dados(self._arquivo) is not None:
+            return unidade.dados(self._arquivo)
+        # Leituras dispensam a trava: o arquivo só é trocado inteiro, nunca fica pela metade
+        inicio = time.perf_counter()
         try:
             with open(self._arquivo, 'rb') as f:
-                return pickle.load(f)
-        except:
+                livros = pickle.load(f)
+                registrar_io(bytes_lidos=f.tell(), carregamentos=1, segundos=time.perf_counter() - inicio)
+                return livros
+        except FileNotFoundError:
             return {}
+        except Exception as e:
+            raise ArquivoCorrompido(f"Não foi possível ler '{self._arquivo}': {e}") from e
     
     def _salvar_todos(self, livros):
-        with open(self._arquivo, 'wb') as f:
-            pickle.dump(livros, f)
+        with self._trava:
+            unidade = unidade_trabalho.unidade_atual()
+            if unidade is not None:
+                unidade.participar(self._arquivo, self._trava, livros)
+            else:
+                unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps(livros))
+    
+    def transacao(self):
+        """Unidade de trabalho: as gravações dos DAOs em arquivo dentro dela são confirmadas juntas"""
+        return unidade_trabalho.transacao()
+    
+    def _chave(self, livro):
+        return livro.codigo
     
     def salvar(self, livro):
-        livros = self._carregar()
-        livros[livro.codigo] = livro
-        self._salvar_todos(livros)
-        return livro
+        with self._trava:
+            livros = self._carregar()
+            livros[livro.codigo] = livro
+            self._salvar_todos(livros)
+            return livro
+    
+    def salvar_varios(self, livros_novos):
+        with self._trava:
+            livros = self._carregar()
+            for livro in livros_novos:
+                livros[self._chave(livro)] = livro
+            self._salvar_todos(livros)
+            return livros_novos
     
     def buscar(self, codigo):
         livros = self._carregar()
         return livros.get(codigo)
     
+    def buscar_varios(self, chaves):
+        livros = self._carregar()
+        return [livros.get(chave) for chave in chaves]
+    
     def buscar_todos(self):
         livros = self._carregar()
         return list(livros.values())
     
     def atualizar(self, livro):
-        livros = self._carregar()
-        if livro.codigo in livros:
-            livros[livro.codigo] = livro
+        with self._trava:
+            livros = self._carregar()
+            if livro.codigo in livros:
+                livros[livro.codigo] = livro
+                self._salvar_todos(livros)
+                return livro
+            return None
+    
+    def atualizar_varios(self, livros_alterados):
+        with self._trava:
+            livros = self._carregar()
+            atualizados = []
+            for livro in livros_alterados:
+                chave = self._chave(livro)
+                if chave in livros:
+                    livros[chave] = livro
+                    atualizados.append(livro)
+                else:
+                    atualizados.append(None)
             self._salvar_todos(livros)
-            return livro
-        return None
+            return atualizados
     
     def deletar(self, codigo):
-        livros = self._carregar()
-        if codigo in livros:
-            del livros[codigo]
-            self._salvar_todos(livros)
-            return True
-        return False
\ No newline at end of file
+        with self._trava:
+            livros = self._carregar()
+            if codigo in livros:
+                del livros[codigo]
+                self._salvar_todos(livros)
+                return True
+            return False
+
+class LivroDAOJournal(JournalDAO):
+    def __init__(self, limite_compactacao=1000, compactacao_em_segundo_plano=True):
+        super().__init__("livros.dat", limite_compactacao, compactacao_em_segundo_plano)
+    
+    def _chave(self, livro):
+        return livro.codigo
+
+class LivroDAOMmap(AbstractDAO):
+    """Livros em registros de tamanho fixo num arquivo mapeado em memória.
+
+    Um índice código -> posição é montado ao abrir. Alterar a disponibilidade
+    grava só o inteiro correspondente, no lugar, sem regravar o catálogo.
+    """
+    
+    # codigo, titulo e autor em UTF-8 completados com zeros; ano, quantidade e disponivel inteiros
+    TAMANHOS_TEXTO = (("codigo", 32), ("titulo", 160), ("autor", 96))
+    FORMATO = "".join(f"{tamanho}s" for _, tamanho in TAMANHOS_TEXTO) + "iii"
+    DESLOCAMENTO_DISPONIVEL = sum(tamanho for _, tamanho in TAMANHOS_TEXTO) + 8
+    
+    def __init__(self, arquivo="livros.mmap", arquivo_legado="livros.dat"):
+        # Na primeira abertura o catálogo do armazenamento em arquivo é migrado
+        if not os.path.exists(arquivo) and os.path.exists(arquivo_legado):
+            self._migrar(arquivo_legado, arquivo)
+        self._registros = ArquivoRegistros(arquivo, self.FORMATO)
+        self._posicoes = {}
+        self._trava = threading.Lock()
+        for posicao, campos in self._registros.registros():
+            self._posicoes[self._decodificar(campos[0])] = posicao
+        atexit.register(self.fechar)
+    
+    def _migrar(self, arquivo_legado, arquivo):
+        """Grava o catálogo legado num temporário que só toma o lugar de `arquivo` quando completo.
+        
+        Se um livro não couber nos registros ou o processo parar no meio, `arquivo`
+        continua inexistente e a migração é refeita na próxima abertura.
+        """
+        with open(arquivo_legado, 'rb') as f:
+            livros = list(pickle.load(f).values())
+        campos = []
+        for livro in livros:
+            try:
+                campos.append(self._campos(livro))
+            except ValueError as e:
+                raise ValueError(f"Livro '{livro.codigo}' não pode ser migrado de '{arquivo_legado}': {e}") from e
+        
+        temporario = arquivo + ".tmp"
+        if os.path.exists(temporario):
+            os.remove(temporario)  # sobra de uma migração interrompida
+        registros = ArquivoRegistros(temporario, self.FORMATO, capacidade_inicial=max(1024, len(campos)))
+        try:
+            for valores in campos:
+                registros.gravar(registros.alocar(), valores)
+        finally:
+            registros.fechar()
+        os.replace(temporario, arquivo)
+    
+    @staticmethod
+    def _decodificar(valor):
+        return valor.rstrip(b"\0").decode("utf-8")
+    
+    def _campos(self, livro):
+        textos = []
+        for (campo, tamanho), valor in zip(self.TAMANHOS_TEXTO, (livro.codigo, livro.titulo, livro.autor)):
+            codificado = str(valor).encode("utf-8")
+            if len(codificado) > tamanho:
+                raise ValueError(f"Campo '{campo}' excede o limite de {tamanho} bytes")
+            textos.append(codificado)
+        return (*textos, livro.ano, livro.quantidade, livro.disponivel)
+    
+    def _de_campos(self, campos):
+        codigo, titulo, autor, ano, quantidade, disponivel = campos
+        livro = Livro(self._decodificar(codigo), self._decodificar(titulo), self._decodificar(autor), ano, quantidade)
+        livro.disponivel = disponivel
+        return livro
+    
+    def salvar(self, livro):
+        campos = self._campos(livro)
+        with self._trava:
+            posicao = self._posicoes.get(livro.codigo)
+            if posicao is None:
+                posicao = self._posicoes[livro.codigo] = self._registros.alocar()
+            self._registros.gravar(posicao, campos)
+        return livro
+    
+    def buscar(self, codigo):
+        with self._trava:
+            posicao = self._posicoes.get(codigo)
+            if posicao is None:
+                return None
+            campos = self._registros.ler(posicao)
+        return self._de_campos(campos)
+    
+    def buscar_todos(self):
+        return list(self.iterar())
+    
+    def iterar(self, tamanho_lote=100):
+        # Em ordem de posição no arquivo, que é a ordem de leitura mais barata
+        with self._trava:
+            posicoes = sorted(self._posicoes.values())
+        for posicao in posicoes:
+            with self._trava:
+                campos = self._registros.ler(posicao) if self._registros.ocupado(posicao) else None
+            if campos is not None:
+                yield self._de_campos(campos)
+    
+    def atualizar(self, livro):
+        campos = self._campos(livro)
+        with self._trava:
+            posicao = self._posicoes.get(livro.codigo)
+            if posicao is None:
+                return None
+            self._registros.gravar(posicao, campos)
+        return livro
+    
+    def atualizar_disponivel(self, codigo, disponivel):
+        """Grava apenas o campo disponivel do livro"""
+        with self._trava:
+            posicao = self._posicoes.get(codigo)
+            if posicao is None:
+                return False
+            self._registros.gravar_campo(posicao, self.DESLOCAMENTO_DISPONIVEL, "<i", disponivel)
+        return True
+    
+    def deletar(self, codigo):
+        with self._trava:
+            posicao = self._posicoes.pop(codigo, None)
+            if posicao is None:
+                return False
+            self._registros.liberar(posicao)
+        return True
+    
+    def fechar(self):
+        self._registros.fechar()
+
+class LivroDAOSQLite(DAOSQLite):
+    _TABELA = "livros"
+    _CHAVE = "codigo"
+    _COLUNAS = ("codigo", "titulo", "autor", "ano", "quantidade", "disponivel")
+    
+    def _de_linha(self, linha):
+        codigo, titulo, autor, ano, quantidade, disponivel = linha
+        livro = Livro(codigo, titulo, autor, ano, quantidade)
+        livro.disponivel = disponivel
+        return livro
+    
+    def salvar(self, livro):
+        self._banco.executar(
+            "INSERT OR REPLACE INTO livros (codigo, titulo, autor, ano, quantidade, disponivel) VALUES (?, ?, ?, ?, ?, ?)",
+            (livro.codigo, livro.titulo, livro.autor, livro.ano, livro.quantidade, livro.disponivel))
+        return livro
+    
+    def atualizar(self, livro):
+        alterados = self._banco.executar(
+            "UPDATE livros SET titulo = ?, autor = ?, ano = ?, quantidade = ?, disponivel = ? WHERE codigo = ?",
+            (livro.titulo, livro.autor, livro.ano, livro.quantidade, livro.disponivel, livro.codigo))
+        return livro if alterados else None
\ No newline at end of file
@@ -0,0 +1,99 @@
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from dao.unidade_trabalho import gravar_atomico
+from util.exceptions import ArquivoCorrompido
+from util.metricas import registrar_io
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) os incrementos em arquivo são atômicos só dentro do processo
+    fcntl = None
+
+# Armazenamento chave-valor para estado auxiliar (estatísticas, sequências etc.)
+class MetadadosDAOMemoria:
+    def __init__(self):
+        self._valores = {}
+    
+    def ler(self, chave, padrao=None):
+        return self._valores.get(chave, padrao)
+    
+    def gravar(self, chave, valor):
+        self._valores[chave] = valor
+    
+    def incrementar(self, chave, quantidade=1):
+        """Soma `quantidade` ao contador e retorna o novo valor"""
+        self._valores[chave] = self._valores.get(chave, 0) + quantidade
+        return self._valores[chave]
+
+class MetadadosDAOArquivo:
+    def __init__(self, arquivo="metadados.dat"):
+        self._arquivo = arquivo
+        self._valores = None
+        self._trava = threading.RLock()
+    
+    def _carregar(self):
+        with self._trava:
+            if self._valores is None:
+                inicio = time.perf_counter()
+                try:
+                    with open(self._arquivo, 'rb') as f:
+                        self._valores = pickle.load(f)
+                        registrar_io(bytes_lidos=f.tell(), carregamentos=1, segundos=time.perf_counter() - inicio)
+                except FileNotFoundError:
+                    self._valores = {}
+                except Exception as e:
+                    raise ArquivoCorrompido(f"Não foi possível ler '{self._arquivo}': {e}") from e
+            return self._valores
+    
+    def ler(self, chave, padrao=None):
+        return self._carregar().get(chave, padrao)
+    
+    @contextmanager
+    def _travar_entre_processos(self):
+        # flock num arquivo ao lado dos dados, que não é substituído por gravar_atomico;
+        # a trava é liberada ao fechar o arquivo
+        if fcntl is None:
+            yield
+            return
+        with open(self._arquivo + ".trava", "ab") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            yield
+    
+    def _alterar(self, chave, alteracao):
+        with self._trava, self._travar_entre_processos():
+            # Relê o arquivo para enxergar o que outro processo gravou, nesta e nas demais chaves
+            self._valores = None
+            valores = self._carregar()
+            valores[chave] = alteracao(valores.get(chave))
+            # Fica fora das unidades de trabalho: uma sequência reservada nunca deve voltar atrás
+            gravar_atomico(self._arquivo, pickle.dumps(valores))
+            return valores[chave]
+    
+    def gravar(self, chave, valor):
+        self._alterar(chave, lambda _: valor)
+    
+    def incrementar(self, chave, quantidade=1):
+        return self._alterar(chave, lambda atual: (atual or 0) + quantidade)
+
+class MetadadosDAOSQLite:
+    def __init__(self, banco):
+        self._banco = banco
+    
+    def ler(self, chave, padrao=None):
+        linha = self._banco.consultar_um("SELECT valor FROM metadados WHERE chave = ?", (chave,))
+        return pickle.loads(linha[0]) if linha else padrao
+    
+    def gravar(self, chave, valor):
+        self._banco.executar("INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)",
+                             (chave, pickle.dumps(valor)))
+    
+    def incrementar(self, chave, quantidade=1):
+        # BEGIN IMMEDIATE trava o banco para escrita: o incremento é atômico entre processos
+        with self._banco.transacao():
+            linha = self._banco.consultar_um("SELECT valor FROM metadados WHERE chave = ?", (chave,))
+            valor = (pickle.loads(linha[0]) if linha else 0) + quantidade
+            self.gravar(chave, valor)
+        return valor
\ No newline at end of file
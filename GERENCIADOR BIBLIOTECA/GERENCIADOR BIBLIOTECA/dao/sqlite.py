@@ -0,0 +1,176 @@
+import sqlite3
+import threading
+import time
+from abc import abstractmethod
+from contextlib import contextmanager
+from dao.abstract_dao import AbstractDAO
+from util.metricas import registrar_io
+
+class BancoSQLite:
+    """Conexão compartilhada pelos DAOs SQLite"""
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            login TEXT PRIMARY KEY,
+            senha TEXT NOT NULL,
+            admin INTEGER NOT NULL,
+            acessos INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS livros (
+            codigo TEXT PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            autor TEXT NOT NULL,
+            ano INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            disponivel INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS emprestimos (
+            codigo TEXT PRIMARY KEY,
+            login_usuario TEXT NOT NULL,
+            codigo_livro TEXT NOT NULL,
+            data_emprestimo TEXT NOT NULL,
+            data_devolucao_prevista TEXT NOT NULL,
+            data_devolucao_real TEXT,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_usuario ON emprestimos (login_usuario);
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_livro ON emprestimos (codigo_livro);
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_status ON emprestimos (status);
+        CREATE TABLE IF NOT EXISTS metadados (
+            chave TEXT PRIMARY KEY,
+            valor BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, arquivo="biblioteca.db"):
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(self.ESQUEMA)
+        self._trava = threading.RLock()
+        self._profundidade = 0
+
+    @contextmanager
+    def transacao(self):
+        """Agrupa as operações em uma transação; transações aninhadas se juntam à externa"""
+        with self._trava:
+            if self._profundidade == 0:
+                self._conexao.execute("BEGIN IMMEDIATE")
+            self._profundidade += 1
+            try:
+                yield self._conexao
+            except BaseException:
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    self._conexao.execute("ROLLBACK")
+                raise
+            else:
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    self._conexao.execute("COMMIT")
+
+    def consultar(self, sql, parametros=()):
+        with self._trava:
+            inicio = time.perf_counter()
+            linhas = self._conexao.execute(sql, parametros).fetchall()
+            registrar_io(segundos=time.perf_counter() - inicio)
+            return linhas
+
+    def consultar_um(self, sql, parametros=()):
+        with self._trava:
+            inicio = time.perf_counter()
+            linha = self._conexao.execute(sql, parametros).fetchone()
+            registrar_io(segundos=time.perf_counter() - inicio)
+            return linha
+
+    def consultar_em(self, sql, chaves, lote=500):
+        """Executa uma consulta com `IN ({})` para as chaves, em lotes"""
+        chaves = list(chaves)
+        linhas = []
+        with self._trava:
+            for inicio in range(0, len(chaves), lote):
+                parte = chaves[inicio:inicio + lote]
+                marcadores = ", ".join("?" * len(parte))
+                linhas.extend(self._conexao.execute(sql.format(marcadores), parte).fetchall())
+        return linhas
+
+    def executar(self, sql, parametros=()):
+        with self.transacao() as conexao:
+            inicio = time.perf_counter()
+            alterados = conexao.execute(sql, parametros).rowcount
+            registrar_io(segundos=time.perf_counter() - inicio)
+            return alterados
+
+
+class DAOSQLite(AbstractDAO):
+    """Consultas comuns aos DAOs SQLite. As subclasses definem a tabela, a chave e as colunas."""
+
+    _TABELA = None
+    _CHAVE = None
+    _COLUNAS = ()
+    transacional = True
+
+    def __init__(self, banco):
+        self._banco = banco
+        self._consulta = f"SELECT {', '.join(self._COLUNAS)} FROM {self._TABELA}"
+
+    @abstractmethod
+    def _de_linha(self, linha):
+        pass
+
+    def _de_linhas(self, linhas):
+        return [self._de_linha(linha) for linha in linhas]
+
+    def salvar_varios(self, objs):
+        # As transações das gravações individuais se juntam a esta: um único commit
+        with self._banco.transacao():
+            for obj in objs:
+                self.salvar(obj)
+        return objs
+
+    def buscar(self, chave):
+        linha = self._banco.consultar_um(f"{self._consulta} WHERE {self._CHAVE} = ?", (chave,))
+        return self._de_linha(linha) if linha else None
+
+    def buscar_varios(self, chaves):
+        linhas = self._banco.consultar_em(f"{self._consulta} WHERE {self._CHAVE} IN ({{}})", chaves)
+        # A chave é sempre a primeira coluna
+        encontrados = {linha[0]: self._de_linha(linha) for linha in linhas}
+        return [encontrados.get(chave) for chave in chaves]
+
+    def buscar_todos(self):
+        return self._de_linhas(self._banco.consultar(self._consulta))
+
+    def iterar(self, tamanho_lote=100):
+        # Paginação pela chave primária: cada lote é uma consulta independente e indexada
+        ultima = None
+        while True:
+            if ultima is None:
+                linhas = self._banco.consultar(f"{self._consulta} ORDER BY {self._CHAVE} LIMIT ?", (tamanho_lote,))
+            else:
+                linhas = self._banco.consultar(
+                    f"{self._consulta} WHERE {self._CHAVE} > ? ORDER BY {self._CHAVE} LIMIT ?", (ultima, tamanho_lote))
+            if not linhas:
+                return
+            yield from self._de_linhas(linhas)
+            ultima = linhas[-1][0]
+
+    def buscar_pagina(self, offset=0, limite=20, ordem=None):
+        sql = self._consulta
+        if ordem is not None:
+            coluna = ordem.lstrip("-")
+            if coluna not in self._COLUNAS:
+                raise ValueError(f"Não é possível ordenar por '{coluna}'")
+            sql += f" ORDER BY {coluna} {'DESC' if ordem.startswith('-') else 'ASC'}, {self._CHAVE}"
+        return self._de_linhas(self._banco.consultar(sql + " LIMIT ? OFFSET ?", (limite, offset)))
+
+    def atualizar_varios(self, objs):
+        with self._banco.transacao():
+            return [self.atualizar(obj) for obj in objs]
+
+    def transacao(self):
+        # Todos os DAOs SQLite compartilham a conexão, então a transação abrange todas as tabelas
+        return self._banco.transacao()
+
+    def deletar(self, chave):
+        return self._banco.executar(f"DELETE FROM {self._TABELA} WHERE {self._CHAVE} = ?", (chave,)) > 0
\ No newline at end of file
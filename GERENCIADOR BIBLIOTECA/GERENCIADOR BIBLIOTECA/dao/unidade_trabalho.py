@@ -0,0 +1,147 @@
+import glob
+import itertools
+import json
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from util.metricas import registrar_io
+
+PADRAO_MANIFESTO = "transacao-*.manifesto"
+
+def _gravar_sincronizado(caminho, dados):
+    inicio = time.perf_counter()
+    with open(caminho, 'wb') as f:
+        f.write(dados)
+        f.flush()
+        os.fsync(f.fileno())
+    registrar_io(bytes_escritos=len(dados), segundos=time.perf_counter() - inicio)
+
+def _sincronizar_diretorio(diretorio):
+    # Garante que as renomeações sobrevivam a uma queda; nem todo sistema permite abrir diretórios
+    try:
+        descritor = os.open(diretorio or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descritor)
+    except OSError:
+        pass
+    finally:
+        os.close(descritor)
+
+def gravar_atomico(caminho, dados):
+    """Grava `dados` (bytes) em um temporário sincronizado e o troca pelo arquivo de uma só vez.
+
+    Uma interrupção no meio deixa o arquivo anterior intacto, nunca truncado.
+    """
+    temporario = caminho + ".tmp"
+    _gravar_sincronizado(temporario, dados)
+    os.replace(temporario, caminho)
+    _sincronizar_diretorio(os.path.dirname(caminho))
+
+
+class UnidadeTrabalho:
+    """Gravações de vários DAOs em arquivo confirmadas juntas.
+
+    Dentro da unidade os DAOs não gravam: entregam o dict completo (participar)
+    e passam a lê-lo dela. Na confirmação todos os temporários são gravados e
+    sincronizados, um manifesto com as trocas pendentes é gravado atomicamente
+    (o ponto de confirmação) e só então cada temporário substitui seu arquivo.
+    Se o processo parar antes do manifesto nada muda; depois dele, recuperar()
+    conclui as trocas na próxima abertura.
+    """
+
+    _sequencia = itertools.count(1)
+
+    def __init__(self):
+        self._participantes = {}
+
+    def participar(self, caminho, trava, dados):
+        # A trava do DAO fica presa até o fim da unidade: ninguém lê nem grava o arquivo por cima
+        if caminho not in self._participantes:
+            trava.acquire()
+        self._participantes[caminho] = (trava, dados)
+
+    def dados(self, caminho):
+        participante = self._participantes.get(caminho)
+        return participante[1] if participante else None
+
+    def _confirmar(self):
+        if not self._participantes:
+            return
+        if len(self._participantes) == 1:
+            # Um único arquivo já é trocado atomicamente, sem manifesto
+            caminho, (_, dados) = next(iter(self._participantes.items()))
+            gravar_atomico(caminho, pickle.dumps(dados))
+            return
+
+        trocas = []
+        for caminho, (_, dados) in self._participantes.items():
+            temporario = caminho + ".tmp"
+            _gravar_sincronizado(temporario, pickle.dumps(dados))
+            trocas.append((temporario, caminho))
+
+        diretorio = os.path.dirname(os.path.abspath(trocas[0][1]))
+        manifesto = os.path.join(diretorio, f"transacao-{os.getpid()}-{next(self._sequencia)}.manifesto")
+        gravar_atomico(manifesto, json.dumps([[os.path.relpath(os.path.abspath(origem), diretorio),
+                                               os.path.relpath(os.path.abspath(destino), diretorio)]
+                                              for origem, destino in trocas]).encode("utf-8"))
+        _concluir(manifesto)
+
+    def _liberar(self):
+        for trava, _ in self._participantes.values():
+            trava.release()
+        self._participantes.clear()
+
+
+def _concluir(manifesto):
+    """Aplica as trocas de um manifesto confirmado; repetir é seguro"""
+    diretorio = os.path.dirname(manifesto)
+    with open(manifesto, encoding="utf-8") as f:
+        trocas = json.load(f)
+    for origem, destino in trocas:
+        origem = os.path.join(diretorio, origem)
+        if os.path.exists(origem):
+            os.replace(origem, os.path.join(diretorio, destino))
+    _sincronizar_diretorio(diretorio)
+    os.remove(manifesto)
+
+
+_recuperados = set()
+_trava_recuperacao = threading.Lock()
+
+def recuperar(diretorio=""):
+    """Conclui as unidades de trabalho confirmadas que uma queda deixou pela metade (uma vez por diretório)"""
+    diretorio = os.path.abspath(diretorio)
+    with _trava_recuperacao:
+        if diretorio in _recuperados:
+            return
+        for manifesto in sorted(glob.glob(os.path.join(diretorio, PADRAO_MANIFESTO))):
+            _concluir(manifesto)
+        _recuperados.add(diretorio)
+
+
+# Unidade de trabalho em andamento na thread atual
+_atual = threading.local()
+
+def unidade_atual():
+    return getattr(_atual, "unidade", None)
+
+@contextmanager
+def transacao():
+    """Abre uma unidade de trabalho na thread atual; unidades aninhadas se juntam à externa"""
+    externa = unidade_atual()
+    if externa is not None:
+        yield externa
+        return
+
+    unidade = UnidadeTrabalho()
+    _atual.unidade = unidade
+    try:
+        yield unidade
+        unidade._confirmar()
+    finally:
+        _atual.unidade = None
+        unidade._liberar()
\ No newline at end of file
@@ -1,6 +1,14 @@
 import pickle
 import os
+import threading
+import time
 from dao.abstract_dao import AbstractDAO
+from dao.journal_dao import JournalDAO
+from dao.sqlite import DAOSQLite
+from dao import unidade_trabalho
+from models.usuario import Usuario
+from util.exceptions import ArquivoCorrompido
+from util.metricas import registrar_io
 
 class UsuarioDAOMemoria(AbstractDAO):
     def __init__(self):
@@ -29,49 +37,133 @@ class UsuarioDAOMemoria(AbstractDAO):
         return False
 
 class UsuarioDAOArquivo(AbstractDAO):
+    transacional = True
+    
     def __init__(self):
         self._arquivo = "usuarios.dat"
+        # Serializa o ciclo carregar/alterar/gravar entre threads
+        self._trava = threading.RLock()
+        unidade_trabalho.recuperar()
         if not os.path.exists(self._arquivo):
-            with open(self._arquivo, 'wb') as f:
-                pickle.dump({}, f)
+            unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps({}))
     
     def _carregar(self):
+        # Dentro de uma unidade de trabalho valem as alterações ainda não confirmadas
+        unidade = unidade_trabalho.unidade_atual()
+        if unidade is not None and unidade.dados(self._arquivo) is not None:
+            return unidade.dados(self._arquivo)
+        # Leituras dispensam a trava: o arquivo só é trocado inteiro, nunca fica pela metade
+        inicio = time.perf_counter()
         try:
             with open(self._arquivo, 'rb') as f:
-                return pickle.load(f)
-        except:
+                usuarios = pickle.load(f)
+                registrar_io(bytes_lidos=f.tell(), carregamentos=1, segundos=time.perf_counter() - inicio)
+                return usuarios
+        except FileNotFoundError:
             return {}
+        except Exception as e:
+            raise ArquivoCorrompido(f"Não foi possível ler '{self._arquivo}': {e}") from e
     
     def _salvar_todos(self, usuarios):
-        with open(self._arquivo, 'wb') as f:
-            pickle.dump(usuarios, f)
+        with self._trava:
+            unidade = unidade_trabalho.unidade_atual()
+            if unidade is not None:
+                unidade.participar(self._arquivo, self._trava, usuarios)
+            else:
+                unidade_trabalho.gravar_atomico(self._arquivo, pickle.dumps(usuarios))
+    
+    def transacao(self):
+        """Unidade de trabalho: as gravações dos DAOs em arquivo dentro dela são confirmadas juntas"""
+        return unidade_trabalho.transacao()
+    
+    def _chave(self, usuario):
+        return usuario.login
     
     def salvar(self, usuario):
-        usuarios = self._carregar()
-        usuarios[usuario.login] = usuario
-        self._salvar_todos(usuarios)
-        return usuario
+        with self._trava:
+            usuarios = self._carregar()
+            usuarios[usuario.login] = usuario
+            self._salvar_todos(usuarios)
+            return usuario
+    
+    def salvar_varios(self, usuarios_novos):
+        with self._trava:
+            usuarios = self._carregar()
+            for usuario in usuarios_novos:
+                usuarios[self._chave(usuario)] = usuario
+            self._salvar_todos(usuarios)
+            return usuarios_novos
     
     def buscar(self, login):
         usuarios = self._carregar()
         return usuarios.get(login)
     
+    def buscar_varios(self, chaves):
+        usuarios = self._carregar()
+        return [usuarios.get(chave) for chave in chaves]
+    
     def buscar_todos(self):
         usuarios = self._carregar()
         return list(usuarios.values())
     
     def atualizar(self, usuario):
-        usuarios = self._carregar()
-        if usuario.login in usuarios:
-            usuarios[usuario.login] = usuario
+        with self._trava:
+            usuarios = self._carregar()
+            if usuario.login in usuarios:
+                usuarios[usuario.login] = usuario
+                self._salvar_todos(usuarios)
+                return usuario
+            return None
+    
+    def atualizar_varios(self, usuarios_alterados):
+        with self._trava:
+            usuarios = self._carregar()
+            atualizados = []
+            for usuario in usuarios_alterados:
+                chave = self._chave(usuario)
+                if chave in usuarios:
+                    usuarios[chave] = usuario
+                    atualizados.append(usuario)
+                else:
+                    atualizados.append(None)
             self._salvar_todos(usuarios)
-            return usuario
-        return None
+            return atualizados
     
     def deletar(self, login):
-        usuarios = self._carregar()
-        if login in usuarios:
-            del usuarios[login]
-            self._salvar_todos(usuarios)
-            return True
-        return False
\ No newline at end of file
+        with self._trava:
+            usuarios = self._carregar()
+            if login in usuarios:
+                del usuarios[login]
+                self._salvar_todos(usuarios)
+                return True
+            return False
+
+class UsuarioDAOJournal(JournalDAO):
+    def __init__(self, limite_compactacao=1000, compactacao_em_segundo_plano=True):
+        super().__init__("usuarios.dat", limite_compactacao, compactacao_em_segundo_plano)
+    
+    def _chave(self, usuario):
+        return usuario.login
+
+class UsuarioDAOSQLite(DAOSQLite):
+    _TABELA = "usuarios"
+    _CHAVE = "login"
+    _COLUNAS = ("login", "senha", "admin", "acessos")
+    
+    def _de_linha(self, linha):
+        login, senha, admin, acessos = linha
+        usuario = Usuario(login, senha, bool(admin))
+        usuario._acessos = acessos
+        return usuario
+    
+    def salvar(self, usuario):
+        self._banco.executar(
+            "INSERT OR REPLACE INTO usuarios (login, senha, admin, acessos) VALUES (?, ?, ?, ?)",
+            (usuario.login, usuario.senha, int(usuario.admin), usuario.acessos))
+        return usuario
+    
+    def atualizar(self, usuario):
+        alterados = self._banco.executar(
+            "UPDATE usuarios SET senha = ?, admin = ?, acessos = ? WHERE login = ?",
+            (usuario.senha, int(usuario.admin), usuario.acessos, usuario.login))
+        return usuario if alterados else None
\ No newline at end of file
@@ -0,0 +1,37 @@
+import argparse
+import csv
+import json
+from business.fachada import Fachada
+from dao.dao_factory import DAOFactory
+
+def ler_linhas(caminho):
+    """Lê um arquivo CSV (com cabeçalho) ou JSON Lines, uma linha por vez"""
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        if caminho.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for linha in f:
+                if linha.strip():
+                    try:
+                        yield json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Mantém a numeração das linhas; o erro aparece no resultado
+                        yield {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação em lote de livros ou usuários")
+    parser.add_argument("tipo", choices=["livros", "usuarios"])
+    parser.add_argument("arquivo", help="arquivo .csv ou .jsonl")
+    parser.add_argument("--armazenamento", default="arquivo", choices=["memoria", "arquivo", "journal", "mmap", "sqlite"])
+    parser.add_argument("--lote", type=int, default=1000, help="linhas gravadas por vez")
+    args = parser.parse_args()
+
+    fachada = Fachada.get_instance(DAOFactory.get_factory(args.armazenamento))
+    if args.tipo == "livros":
+        resultado = fachada.importar_livros(ler_linhas(args.arquivo), args.lote)
+    else:
+        resultado = fachada.importar_usuarios(ler_linhas(args.arquivo), args.lote)
+    print(resultado)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -12,11 +12,26 @@ def main():
     print("Como deseja armazenar os dados?")
     print("1. Em memória (RAM)")
     print("2. Em arquivo")
+    print("3. Em arquivo com journal (log de escrita antecipada)")
+    print("4. Em arquivo com cache em memória")
+    print("5. Em banco de dados SQLite")
+    print("6. Em arquivo com catálogo mapeado em memória")
+    print("7. Em arquivo com cache e gravação em grupo")
     
     opcao = input("Escolha uma opção: ")
     
     if opcao == "1":
         dao_factory = DAOFactory.get_factory("memoria")
+    elif opcao == "3":
+        dao_factory = DAOFactory.get_factory("journal")
+    elif opcao == "4":
+        dao_factory = DAOFactory.get_factory("arquivo", cache="write-through")
+    elif opcao == "5":
+        dao_factory = DAOFactory.get_factory("sqlite")
+    elif opcao == "6":
+        dao_factory = DAOFactory.get_factory("mmap")
+    elif opcao == "7":
+        dao_factory = DAOFactory.get_factory("arquivo", cache="group-commit")
     else:
         dao_factory = DAOFactory.get_factory("arquivo")
     
@@ -1,25 +1,80 @@
 from datetime import datetime, timedelta
 
+# Versão do formato serializado; mudanças de campos incrementam a versão
+VERSAO_SERIALIZACAO = 1
+
+def _restaurar(versao, *campos):
+    """Reconstrói um Emprestimo a partir da tupla gravada por Emprestimo.__reduce__"""
+    if versao != 1:
+        raise ValueError(f"Versão de serialização de Emprestimo desconhecida: {versao}")
+    return Emprestimo.de_referencias(*campos)
+
 class Emprestimo:
+    __slots__ = ("_codigo", "_login_usuario", "_codigo_livro", "_usuario", "_livro", "_buscar_usuario",
+                 "_buscar_livro", "_data_emprestimo", "_data_devolucao_prevista", "_data_devolucao_real",
+                 "_status", "__weakref__")
+    
     def __init__(self, codigo, usuario, livro, data_emprestimo=None):
         self._codigo = codigo
+        # Apenas as chaves são persistidas; usuário e livro são resolvidos ao carregar
+        self._login_usuario = usuario.login
+        self._codigo_livro = livro.codigo
         self._usuario = usuario
         self._livro = livro
+        self._buscar_usuario = None
+        self._buscar_livro = None
         self._data_emprestimo = data_emprestimo if data_emprestimo else datetime.now()
         self._data_devolucao_prevista = self._data_emprestimo + timedelta(days=15)
         self._data_devolucao_real = None
         self._status = "Ativo"
     
+    @classmethod
+    def de_referencias(cls, codigo, login_usuario, codigo_livro, data_emprestimo, data_devolucao_prevista,
+                       data_devolucao_real, status):
+        """Reconstrói um empréstimo persistido apenas com as chaves de usuário e livro"""
+        emprestimo = cls.__new__(cls)
+        emprestimo._codigo = codigo
+        emprestimo._login_usuario = login_usuario
+        emprestimo._codigo_livro = codigo_livro
+        emprestimo._data_emprestimo = data_emprestimo
+        emprestimo._data_devolucao_prevista = data_devolucao_prevista
+        emprestimo._data_devolucao_real = data_devolucao_real
+        emprestimo._status = status
+        emprestimo._usuario = None
+        emprestimo._livro = None
+        emprestimo._buscar_usuario = None
+        emprestimo._buscar_livro = None
+        return emprestimo
+    
+    def vincular(self, buscar_usuario, buscar_livro):
+        """Passa a resolver usuário e livro pelas chaves (ver MapaIdentidade)"""
+        self._buscar_usuario = buscar_usuario
+        self._buscar_livro = buscar_livro
+        self._usuario = None
+        self._livro = None
+    
     @property
     def codigo(self):
         return self._codigo
     
+    @property
+    def login_usuario(self):
+        return self._login_usuario
+    
+    @property
+    def codigo_livro(self):
+        return self._codigo_livro
+    
     @property
     def usuario(self):
+        if self._buscar_usuario is not None:
+            return self._buscar_usuario(self._login_usuario)
         return self._usuario
     
     @property
     def livro(self):
+        if self._buscar_livro is not None:
+            return self._buscar_livro(self._codigo_livro)
         return self._livro
     
     @property
@@ -42,5 +97,32 @@ class Emprestimo:
         self._data_devolucao_real = datetime.now()
         self._status = "Devolvido"
     
+    def reabrir(self):
+        """Desfaz devolver() quando a devolução não pôde ser gravada"""
+        self._data_devolucao_real = None
+        self._status = "Ativo"
+    
+    def __reduce__(self):
+        # Usuário e livro não são gravados, apenas as suas chaves
+        return (_restaurar, (VERSAO_SERIALIZACAO, self._codigo, self._login_usuario, self._codigo_livro,
+                             self._data_emprestimo, self._data_devolucao_prevista, self._data_devolucao_real,
+                             self._status))
+    
+    def __setstate__(self, estado):
+        # Arquivos antigos guardam o __dict__ do objeto; os mais antigos ainda embutiam
+        # cópias completas do usuário e do livro
+        if "_login_usuario" not in estado:
+            estado["_login_usuario"] = estado["_usuario"].login
+            estado["_codigo_livro"] = estado["_livro"].codigo
+        for atributo in ("_codigo", "_login_usuario", "_codigo_livro", "_data_emprestimo",
+                         "_data_devolucao_prevista", "_data_devolucao_real", "_status"):
+            setattr(self, atributo, estado[atributo])
+        self._usuario = None
+        self._livro = None
+        self._buscar_usuario = None
+        self._buscar_livro = None
+    
     def __str__(self):
-        return f"Empréstimo: {self._codigo} | Usuário: {self._usuario.login} | Livro: {self._livro.titulo} | Status: {self._status}"
\ No newline at end of file
+        livro = self.livro
+        titulo = livro.titulo if livro else self._codigo_livro
+        return f"Empréstimo: {self._codigo} | Usuário: {self._login_usuario} | Livro: {titulo} | Status: {self._status}"
\ No newline at end of file
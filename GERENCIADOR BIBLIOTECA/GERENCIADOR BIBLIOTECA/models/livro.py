@@ -1,4 +1,17 @@
+# Versão do formato serializado; mudanças de campos incrementam a versão
+VERSAO_SERIALIZACAO = 1
+
+def _restaurar(versao, *campos):
+    """Reconstrói um Livro a partir da tupla gravada por Livro.__reduce__"""
+    if versao != 1:
+        raise ValueError(f"Versão de serialização de Livro desconhecida: {versao}")
+    livro = Livro.__new__(Livro)
+    livro._codigo, livro._titulo, livro._autor, livro._ano, livro._quantidade, livro._disponivel = campos
+    return livro
+
 class Livro:
+    __slots__ = ("_codigo", "_titulo", "_autor", "_ano", "_quantidade", "_disponivel", "__weakref__")
+    
     def __init__(self, codigo, titulo, autor, ano, quantidade):
         self._codigo = codigo
         self._titulo = titulo
@@ -35,5 +48,15 @@ class Livro:
     def disponivel(self, valor):
         self._disponivel = valor
     
+    def __reduce__(self):
+        # Grava só os valores, sem os nomes dos atributos
+        return (_restaurar, (VERSAO_SERIALIZACAO, self._codigo, self._titulo, self._autor, self._ano,
+                             self._quantidade, self._disponivel))
+    
+    def __setstate__(self, estado):
+        # Arquivos antigos guardam o __dict__ completo do objeto
+        for atributo, valor in estado.items():
+            setattr(self, atributo, valor)
+    
     def __str__(self):
         return f"Código: {self._codigo} | Título: {self._titulo} | Autor: {self._autor} | Ano: {self._ano} | Disponível: {self._disponivel}/{self._quantidade}"
\ No newline at end of file
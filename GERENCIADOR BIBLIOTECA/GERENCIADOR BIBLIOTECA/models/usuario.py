@@ -1,4 +1,17 @@
+# Versão do formato serializado; mudanças de campos incrementam a versão
+VERSAO_SERIALIZACAO = 1
+
+def _restaurar(versao, *campos):
+    """Reconstrói um Usuario a partir da tupla gravada por Usuario.__reduce__"""
+    if versao != 1:
+        raise ValueError(f"Versão de serialização de Usuario desconhecida: {versao}")
+    usuario = Usuario.__new__(Usuario)
+    usuario._login, usuario._senha, usuario._admin, usuario._acessos = campos
+    return usuario
+
 class Usuario:
+    __slots__ = ("_login", "_senha", "_admin", "_acessos", "__weakref__")
+    
     def __init__(self, login, senha, admin=False):
         self._login = login
         self._senha = senha
@@ -24,5 +37,17 @@ class Usuario:
     def incrementar_acesso(self):
         self._acessos += 1
     
+    def alterar_senha(self, senha):
+        """Substitui a senha armazenada (um hash, ver util.senhas)"""
+        self._senha = senha
+    
+    def __reduce__(self):
+        return (_restaurar, (VERSAO_SERIALIZACAO, self._login, self._senha, self._admin, self._acessos))
+    
+    def __setstate__(self, estado):
+        # Arquivos antigos guardam o __dict__ completo do objeto
+        for atributo, valor in estado.items():
+            setattr(self, atributo, valor)
+    
     def __str__(self):
         return f"Usuário: {self._login} | Admin: {'Sim' if self._admin else 'Não'} | Acessos: {self._acessos}"
\ No newline at end of file
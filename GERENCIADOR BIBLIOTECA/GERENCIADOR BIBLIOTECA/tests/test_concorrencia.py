@@ -0,0 +1,134 @@
+import multiprocessing
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+BACKENDS = ["memoria", "arquivo", "arquivo:group-commit", "journal", "mmap", "sqlite"]
+SENHA = "Senha123!"
+LIVROS = {"LA": 6, "LB": 6, "LC": 3}
+USUARIOS = ["leitora", "leitor"]
+THREADS = 12
+OPERACOES = 30
+
+def _abrir(backend, diretorio):
+    from business.fachada import Fachada
+    from dao.dao_factory import DAOFactory
+    import os
+
+    # O processo permanece no diretório até o fim, para que os atexit dos DAOs gravem nele
+    os.chdir(diretorio)
+    tipo, _, cache = backend.partition(":")
+    return Fachada.get_instance(DAOFactory.get_factory(tipo, cache or None))
+
+def _estado(fachada):
+    """O que a biblioteca diz de si mesma: exemplares disponíveis, empréstimos ativos e estatísticas"""
+    resumo = fachada.resumir_emprestimos()
+    return {
+        "disponivel": {codigo: fachada.buscar_livro(codigo).disponivel for codigo in LIVROS},
+        "ativos": sorted(e.codigo for e in fachada.buscar_emprestimos_ativos()),
+        "ativos_por_livro": {codigo: sum(1 for e in fachada.buscar_emprestimos_livro(codigo) if e.status == "Ativo")
+                             for codigo in LIVROS},
+        "estatisticas": {"total": resumo["total"], "ativos": resumo["ativos"], "devolvidos": resumo["devolvidos"],
+                         "por_livro": dict(resumo["top_livros"])},
+    }
+
+def exercitar(backend, diretorio, semente):
+    """Threads emprestam e devolvem (um a um e em lote) os mesmos livros; retorna o que cada uma conseguiu
+    e o estado final da biblioteca (roda em processo separado)"""
+    fachada = _abrir(backend, diretorio)
+    for login in USUARIOS:
+        fachada.cadastrar_usuario(login, SENHA)
+    for codigo, quantidade in LIVROS.items():
+        # O título é o código para que o top de livros das estatísticas seja comparável
+        fachada.cadastrar_livro(codigo, codigo, "Autor", 2000, quantidade)
+    # A primeira consulta monta as estatísticas; daí em diante elas são atualizadas a cada evento
+    fachada.resumir_emprestimos()
+
+    realizados = []
+    devolvidos = []
+    trava = threading.Lock()
+
+    def trabalhar(indice):
+        aleatorio = random.Random(semente + indice)
+        login = USUARIOS[indice % len(USUARIOS)]
+        meus = []  # cada thread devolve só os empréstimos que ela fez
+        for _ in range(OPERACOES):
+            operacao = aleatorio.randrange(4)
+            novos, fim = [], []
+            if operacao == 0:
+                try:
+                    novos = [fachada.realizar_emprestimo(None, login, aleatorio.choice(list(LIVROS)))]
+                except ValueError:
+                    pass  # sem exemplares
+            elif operacao == 1:
+                novos = fachada.realizar_emprestimos_lote(login, aleatorio.sample(list(LIVROS), 2)).sucessos
+            elif operacao == 2 and meus:
+                fim = [fachada.devolver_livro(meus.pop(aleatorio.randrange(len(meus))).codigo)]
+            elif operacao == 3 and meus:
+                lote = meus[:2]
+                del meus[:2]
+                fim = fachada.devolver_lote([e.codigo for e in lote]).sucessos
+            meus.extend(novos)
+            with trava:
+                realizados.extend((e.codigo, e.codigo_livro) for e in novos)
+                devolvidos.extend(e.codigo for e in fim)
+
+    threads = [threading.Thread(target=trabalhar, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return realizados, devolvidos, _estado(fachada)
+
+def reabrir(backend, diretorio):
+    """Estado da biblioteca lido do disco por um processo novo"""
+    return _estado(_abrir(backend, diretorio))
+
+
+class TestConcorrencia(unittest.TestCase):
+    """Empréstimos e devoluções concorrentes não perdem nem duplicam atualizações em nenhum backend"""
+
+    def _em_processo(self, funcao, *args):
+        # Um processo novo por execução: o singleton da Fachada, os arquivos e os atexit dos DAOs não se misturam
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return executor.submit(funcao, *args).result()
+
+    def _conferir(self, estado, realizados, devolvidos):
+        codigos = [codigo for codigo, _ in realizados]
+        self.assertEqual(len(codigos), len(set(codigos)), "código de empréstimo repetido")
+        self.assertEqual(len(devolvidos), len(set(devolvidos)), "empréstimo devolvido duas vezes")
+        self.assertLessEqual(set(devolvidos), set(codigos))
+
+        ativos = sorted(set(codigos) - set(devolvidos))
+        self.assertEqual(estado["ativos"], ativos)
+        for codigo_livro, quantidade in LIVROS.items():
+            emprestados = sum(1 for codigo, livro in realizados if livro == codigo_livro and codigo in ativos)
+            self.assertEqual(estado["ativos_por_livro"][codigo_livro], emprestados, codigo_livro)
+            self.assertEqual(estado["disponivel"][codigo_livro], quantidade - emprestados, codigo_livro)
+            self.assertGreaterEqual(estado["disponivel"][codigo_livro], 0, codigo_livro)
+
+        por_livro = {codigo_livro: sum(1 for _, livro in realizados if livro == codigo_livro)
+                     for codigo_livro in LIVROS}
+        self.assertEqual(estado["estatisticas"], {
+            "total": len(codigos), "ativos": len(ativos), "devolvidos": len(devolvidos),
+            "por_livro": {codigo: total for codigo, total in por_livro.items() if total}})
+
+    def test_emprestimos_e_devolucoes_concorrentes(self):
+        for semente, backend in enumerate(BACKENDS):
+            with self.subTest(backend=backend):
+                diretorio = tempfile.mkdtemp(prefix=f"sgb-teste-{backend.replace(':', '-')}-")
+                try:
+                    realizados, devolvidos, estado = self._em_processo(exercitar, backend, diretorio, semente)
+                    self.assertTrue(realizados and devolvidos, "a carga não exercitou empréstimos e devoluções")
+                    self._conferir(estado, realizados, devolvidos)
+                    if backend != "memoria":
+                        self._conferir(self._em_processo(reabrir, backend, diretorio), realizados, devolvidos)
+                finally:
+                    shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -1,8 +1,9 @@
 import os
-import random
 from util.exceptions import LoginInvalido, SenhaInvalida
 
 class MenuAdmin:
+    TAMANHO_PAGINA = 20
+    
     def __init__(self, fachada, usuario):
         self._fachada = fachada
         self._usuario = usuario
@@ -101,13 +102,27 @@ class MenuAdmin:
         self.limpar_tela()
         print("=== LISTA DE USUÁRIOS ===\n")
         
-        usuarios = self._fachada.buscar_todos_usuarios()
-        
-        if not usuarios:
-            print("Nenhum usuário cadastrado.")
-        else:
-            for i, usuario in enumerate(usuarios, 1):
-                print(f"{i}. {usuario}")
+        self._listar_paginado(self._fachada.buscar_pagina_usuarios, "Nenhum usuário cadastrado.")
+    
+    def _listar_paginado(self, buscar_pagina, mensagem_vazia):
+        offset = 0
+        while True:
+            # Busca um item a mais para saber se existe uma próxima página
+            itens = buscar_pagina(offset, self.TAMANHO_PAGINA + 1)
+            
+            if not itens and offset == 0:
+                print(mensagem_vazia)
+                break
+            
+            for i, item in enumerate(itens[:self.TAMANHO_PAGINA], offset + 1):
+                print(f"{i}. {item}")
+            
+            if len(itens) <= self.TAMANHO_PAGINA:
+                break
+            
+            offset += self.TAMANHO_PAGINA
+            if input("\nENTER para a próxima página ou 0 para sair: ") == "0":
+                return
         
         input("\nPressione ENTER para continuar...")
     
@@ -125,9 +140,7 @@ class MenuAdmin:
         
         print(f"\nEditando usuário: {usuario}")
         
-        senha = input("Nova senha (deixe em branco para manter): ")
-        if not senha:
-            senha = usuario.senha
+        senha = input("Nova senha (deixe em branco para manter): ") or None
         
         admin_opcao = input(f"Perfil de administrador (S/N) [{'S' if usuario.admin else 'N'}]? ").upper()
         admin = admin_opcao == "S" if admin_opcao else usuario.admin
@@ -209,15 +222,7 @@ class MenuAdmin:
         self.limpar_tela()
         print("=== LISTA DE LIVROS ===\n")
         
-        livros = self._fachada.buscar_todos_livros()
-        
-        if not livros:
-            print("Nenhum livro cadastrado.")
-        else:
-            for i, livro in enumerate(livros, 1):
-                print(f"{i}. {livro}")
-        
-        input("\nPressione ENTER para continuar...")
+        self._listar_paginado(self._fachada.buscar_pagina_livros, "Nenhum livro cadastrado.")
     
     def _editar_livro(self):
         self.limpar_tela()
@@ -290,12 +295,11 @@ class MenuAdmin:
         self.limpar_tela()
         print("=== REALIZAR EMPRÉSTIMO ===\n")
         
-        codigo = codigo = f"EMP{random.randint(0000, 9999)}"
         login_usuario = input("Login do usuário: ")
         codigo_livro = input("Código do livro: ")
         
         try:
-            emprestimo = self._fachada.realizar_emprestimo(codigo, login_usuario, codigo_livro)
+            emprestimo = self._fachada.realizar_emprestimo(None, login_usuario, codigo_livro)
             print("\nEmpréstimo realizado com sucesso!")
             print(f"Detalhes: {emprestimo}")
         except ValueError as e:
@@ -322,22 +326,18 @@ class MenuAdmin:
         self.limpar_tela()
         print("=== LISTA DE EMPRÉSTIMOS ===\n")
         
-        emprestimos = self._fachada.buscar_todos_emprestimos()
-        
-        if not emprestimos:
-            print("Nenhum empréstimo registrado.")
-        else:
-            for i, emprestimo in enumerate(emprestimos, 1):
-                print(f"{i}. {emprestimo}")
-        
-        input("\nPressione ENTER para continuar...")
+        self._listar_paginado(self._fachada.buscar_pagina_emprestimos, "Nenhum empréstimo registrado.")
     
     def _gerar_relatorio_acessos(self):
         self.limpar_tela()
         print("=== RELATÓRIO DE ACESSOS DOS USUÁRIOS ===\n")
         
-        relatorio = self._fachada.gerar_relatorio_acessos()
-        print(relatorio)
+        top_n = input("Quantos usuários exibir no ranking (ENTER para todos)? ")
+        try:
+            relatorio = self._fachada.gerar_relatorio_acessos(int(top_n) if top_n else None)
+            print(f"\n{relatorio}")
+        except ValueError:
+            print("\nQuantidade inválida.")
         
         input("\nPressione ENTER para continuar...")
     
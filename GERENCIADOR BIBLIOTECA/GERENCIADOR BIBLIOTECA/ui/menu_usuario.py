@@ -1,6 +1,8 @@
 import os
 
 class MenuUsuario:
+    TAMANHO_PAGINA = 20
+    
     def __init__(self, fachada, usuario):
         self._fachada = fachada
         self._usuario = usuario
@@ -37,16 +39,24 @@ class MenuUsuario:
         self.limpar_tela()
         print("=== LIVROS DISPONÍVEIS ===\n")
         
-        livros = self._fachada.buscar_todos_livros()
-        livros_disponiveis = [livro for livro in livros if livro.disponivel > 0]
+        total = self._fachada.contar_livros_disponiveis()
         
-        if not livros_disponiveis:
+        if not total:
             print("Nenhum livro disponível no momento.")
-        else:
-            for i, livro in enumerate(livros_disponiveis, 1):
-                print(f"{i}. {livro}")
+            input("\nPressione ENTER para continuar...")
+            return
         
-        input("\nPressione ENTER para continuar...")
+        offset = 0
+        while offset < total:
+            livros_disponiveis = self._fachada.buscar_livros_disponiveis(offset, self.TAMANHO_PAGINA)
+            for i, livro in enumerate(livros_disponiveis, offset + 1):
+                print(f"{i}. {livro}")
+            
+            offset += self.TAMANHO_PAGINA
+            if offset >= total:
+                input("\nPressione ENTER para continuar...")
+            elif input(f"\nExibidos {offset} de {total}. ENTER para a próxima página ou 0 para sair: ") == "0":
+                break
     
     def _listar_meus_emprestimos(self):
         self.limpar_tela()
@@ -66,10 +76,9 @@ class MenuUsuario:
         self.limpar_tela()
         print("=== BUSCAR LIVRO POR TÍTULO ===\n")
         
-        titulo = input("Digite parte do título: ").lower()
+        titulo = input("Digite parte do título ou do autor: ")
         
-        livros = self._fachada.buscar_todos_livros()
-        livros_encontrados = [livro for livro in livros if titulo in livro.titulo.lower()]
+        livros_encontrados = self._fachada.pesquisar_livros(titulo, limite=20)
         
         print(f"\nResultados da busca por '{titulo}':")
         
@@ -1,22 +1,148 @@
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from util.metricas import medir_io
+
+_SIMPLES = (str, int, float, bool, type(None))
+
+def _simples(valor):
+    if isinstance(valor, (list, tuple)):
+        return all(_simples(item) for item in valor)
+    return isinstance(valor, _SIMPLES)
 
 class Comando(ABC):
     """Interface para o padrão Command"""
     
+    # Atributos que nunca vão para o histórico (ex.: senhas)
+    CAMPOS_OCULTOS = ()
+    
     @abstractmethod
     def executar(self):
         pass
+    
+    def resumo(self):
+        """Argumentos do comando para o histórico: só valores simples, sem gerenciadores nem campos ocultos"""
+        argumentos = {}
+        for nome, valor in vars(self).items():
+            if nome in self.CAMPOS_OCULTOS:
+                continue
+            if _simples(valor):
+                argumentos[nome.lstrip("_")] = valor
+        return argumentos
+
+class RegistroHistorico:
+    """Entrada compacta do histórico: momento, tipo do comando e argumentos"""
+    __slots__ = ("momento", "comando", "argumentos")
+    
+    def __init__(self, momento, comando, argumentos):
+        self.momento = momento
+        self.comando = comando
+        self.argumentos = argumentos
+    
+    def para_json(self):
+        return json.dumps({"t": self.momento.isoformat(), "c": self.comando, "a": self.argumentos},
+                          ensure_ascii=False, separators=(",", ":"))
+    
+    @classmethod
+    def de_json(cls, linha):
+        dados = json.loads(linha)
+        return cls(datetime.fromisoformat(dados["t"]), dados["c"], dados["a"])
+    
+    def __repr__(self):
+        return f"RegistroHistorico({self.momento.isoformat()}, {self.comando}, {self.argumentos})"
 
 class Invoker:
-    """Invocador para o padrão Command"""
+    """Invocador para o padrão Command.
+    
+    Guarda só as últimas `limite_historico` execuções, como registros compactos
+    (os comandos em si, que prendem gerenciadores e argumentos, são descartados).
+    Com `arquivo_auditoria`, toda execução também é acrescentada a um arquivo
+    JSON Lines, que consultar_historico percorre quando a memória não basta.
+    """
     
-    def __init__(self):
-        self._historico = []
+    def __init__(self, metricas=None, limite_historico=1000, arquivo_auditoria=None):
+        self._historico = deque(maxlen=limite_historico)
+        self._trava = threading.Lock()
+        self._arquivo_auditoria = arquivo_auditoria
+        self._auditoria = None
+        # RegistroMetricas opcional: contagem, erros, latência e E/S de DAO por tipo de comando
+        self._metricas = metricas
     
     def executar(self, comando):
-        resultado = comando.executar()
-        self._historico.append(comando)
+        if self._metricas is None:
+            resultado = comando.executar()
+        else:
+            resultado = self._executar_medindo(comando)
+        self._registrar(type(comando).__name__, comando.resumo())
         return resultado
     
+    def _executar_medindo(self, comando):
+        rotulos = (("comando", type(comando).__name__),)
+        inicio = time.perf_counter()
+        try:
+            with medir_io() as io:
+                return comando.executar()
+        except Exception:
+            self._metricas.contar("sgb_comandos_erros_total", rotulos)
+            raise
+        finally:
+            self._metricas.contar("sgb_comandos_total", rotulos)
+            self._metricas.observar("sgb_comando_duracao_segundos", rotulos, time.perf_counter() - inicio)
+            self._metricas.contar("sgb_dao_bytes_lidos_total", rotulos, io["bytes_lidos"])
+            self._metricas.contar("sgb_dao_bytes_escritos_total", rotulos, io["bytes_escritos"])
+            self._metricas.contar("sgb_dao_carregamentos_total", rotulos, io["carregamentos"])
+            self._metricas.contar("sgb_dao_segundos_total", rotulos, io["segundos"])
+    
+    def _registrar(self, nome_comando, argumentos):
+        with self._trava:
+            # O momento é tomado sob a trava para que o histórico fique em ordem cronológica
+            registro = RegistroHistorico(datetime.now(), nome_comando, argumentos)
+            self._historico.append(registro)
+            if self._arquivo_auditoria is not None:
+                if self._auditoria is None:
+                    self._auditoria = open(self._arquivo_auditoria, "a", encoding="utf-8")
+                self._auditoria.write(registro.para_json() + "\n")
+                self._auditoria.flush()
+    
     def get_historico(self):
-        return self._historico
\ No newline at end of file
+        """Registros ainda em memória, do mais antigo ao mais recente"""
+        with self._trava:
+            return list(self._historico)
+    
+    def consultar_historico(self, comando=None, desde=None, ate=None, limite=None):
+        """Registros filtrados por tipo de comando e janela [desde, ate], do mais antigo ao mais recente.
+        
+        Quando os registros em memória bastam (a janela começa depois do mais
+        antigo deles, ou já há `limite` resultados), a consulta não toca no disco;
+        caso contrário o arquivo de auditoria é lido em fluxo.
+        """
+        with self._trava:
+            em_memoria = list(self._historico)
+        selecionados = self._filtrar(em_memoria, comando, desde, ate, limite)
+        if self._arquivo_auditoria is None or (desde is not None and em_memoria and desde >= em_memoria[0].momento) \
+                or (limite is not None and len(selecionados) >= limite):
+            return selecionados
+        return self._filtrar(self._ler_auditoria(), comando, desde, ate, limite)
+    
+    @staticmethod
+    def _filtrar(registros, comando, desde, ate, limite):
+        # Os registros estão em ordem cronológica; com limite ficam os mais recentes
+        selecionados = deque(maxlen=limite)
+        for registro in registros:
+            if ate is not None and registro.momento > ate:
+                break
+            if (desde is None or registro.momento >= desde) and (comando is None or registro.comando == comando):
+                selecionados.append(registro)
+        return list(selecionados)
+    
+    def _ler_auditoria(self):
+        try:
+            with open(self._arquivo_auditoria, encoding="utf-8") as f:
+                for linha in f:
+                    if linha.strip():
+                        yield RegistroHistorico.de_json(linha)
+        except FileNotFoundError:
+            return
\ No newline at end of file
@@ -0,0 +1,33 @@
+import threading
+from contextlib import contextmanager
+
+# Efeitos adiados pelo contexto aberto na thread atual
+_atual = threading.local()
+
+@contextmanager
+def adiar_efeitos():
+    """Adia os efeitos em memória (índices, observadores) registrados com aplicar_efeito dentro do contexto:
+    rodam quando ele termina sem erro e são descartados se uma exceção o interromper.
+
+    Envolvendo uma transação do DAO, os índices só mudam depois que as gravações forem confirmadas.
+    Contextos aninhados se juntam ao externo.
+    """
+    if getattr(_atual, "efeitos", None) is not None:
+        yield
+        return
+
+    _atual.efeitos = efeitos = []
+    try:
+        yield
+    finally:
+        _atual.efeitos = None
+    for efeito in efeitos:
+        efeito()
+
+def aplicar_efeito(efeito):
+    """Roda `efeito` agora ou, dentro de adiar_efeitos, ao fim do contexto"""
+    efeitos = getattr(_atual, "efeitos", None)
+    if efeitos is None:
+        efeito()
+    else:
+        efeitos.append(efeito)
\ No newline at end of file
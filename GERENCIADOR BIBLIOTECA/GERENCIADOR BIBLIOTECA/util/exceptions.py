@@ -4,4 +4,16 @@ class LoginInvalido(Exception):
 
 class SenhaInvalida(Exception):
     """Exceção para senha inválida"""
+    pass
+
+class ArquivoCorrompido(Exception):
+    """Exceção para arquivo de dados ilegível"""
+    pass
+
+class SessaoInvalida(Exception):
+    """Exceção para token de sessão desconhecido ou expirado"""
+    pass
+
+class AcessoNegado(Exception):
+    """Exceção para operação não permitida ao usuário da sessão"""
     pass
\ No newline at end of file
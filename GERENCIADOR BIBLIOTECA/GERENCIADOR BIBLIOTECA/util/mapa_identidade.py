@@ -0,0 +1,44 @@
+class MapaIdentidade:
+    """Mantém uma única instância em memória por chave (padrão Identity Map)"""
+    
+    def __init__(self, carregar, carregar_varios=None):
+        self._carregar = carregar
+        self._carregar_varios = carregar_varios
+        self._instancias = {}
+    
+    def obter(self, chave):
+        obj = self._instancias.get(chave)
+        if obj is None:
+            obj = self._carregar(chave)
+            if obj is not None:
+                # setdefault é atômico: se outra thread carregou antes, vale a instância dela
+                obj = self._instancias.setdefault(chave, obj)
+        return obj
+    
+    def obter_varios(self, chaves):
+        """Retorna um dict chave -> instância, carregando as ausentes em uma única chamada"""
+        faltantes = [chave for chave in set(chaves) if chave not in self._instancias]
+        if faltantes:
+            if self._carregar_varios:
+                carregados = self._carregar_varios(faltantes)
+            else:
+                carregados = [self._carregar(chave) for chave in faltantes]
+            for chave, obj in zip(faltantes, carregados):
+                if obj is not None:
+                    self._instancias.setdefault(chave, obj)
+        instancias = self._instancias
+        return {chave: instancias[chave] for chave in chaves if chave in instancias}
+    
+    def registrar(self, chave, obj):
+        """Registra o objeto carregado, preferindo a instância que já estiver no mapa"""
+        return self._instancias.setdefault(chave, obj)
+    
+    def substituir(self, chave, obj):
+        self._instancias[chave] = obj
+        return obj
+    
+    def remover(self, chave):
+        self._instancias.pop(chave, None)
+    
+    def limpar(self):
+        self._instancias.clear()
\ No newline at end of file
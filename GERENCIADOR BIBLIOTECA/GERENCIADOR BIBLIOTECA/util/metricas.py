@@ -0,0 +1,117 @@
+import bisect
+import threading
+from contextlib import contextmanager
+
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histograma:
+    """Distribuição de valores em baldes cumulativos, no formato do Prometheus"""
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self._limites = limites
+        self._baldes = [0] * (len(limites) + 1)
+        self._soma = 0.0
+        self._contagem = 0
+
+    def observar(self, valor):
+        self._baldes[bisect.bisect_left(self._limites, valor)] += 1
+        self._soma += valor
+        self._contagem += 1
+
+    def instantaneo(self):
+        acumulado = 0
+        baldes = {}
+        for limite, quantidade in zip(self._limites + (float("inf"),), self._baldes):
+            acumulado += quantidade
+            baldes["+Inf" if limite == float("inf") else repr(limite)] = acumulado
+        return {"contagem": self._contagem, "soma": self._soma, "baldes": baldes}
+
+
+class RegistroMetricas:
+    """Contadores e histogramas identificados por nome e rótulos; seguro entre threads"""
+
+    def __init__(self):
+        self._contadores = {}
+        self._histogramas = {}
+        self._trava = threading.Lock()
+
+    def contar(self, nome, rotulos=(), valor=1):
+        chave = (nome, tuple(rotulos))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, rotulos, valor):
+        chave = (nome, tuple(rotulos))
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(valor)
+
+    def instantaneo(self):
+        """Cópia dos valores atuais: {nome: {rótulos: valor}}, com rótulos no formato 'chave=valor,...'"""
+        with self._trava:
+            resultado = {}
+            for (nome, rotulos), valor in self._contadores.items():
+                resultado.setdefault(nome, {})[_texto_rotulos(rotulos)] = valor
+            for (nome, rotulos), histograma in self._histogramas.items():
+                resultado.setdefault(nome, {})[_texto_rotulos(rotulos)] = histograma.instantaneo()
+            return resultado
+
+    def exportar_prometheus(self):
+        """Valores atuais no formato de texto de exposição do Prometheus"""
+        with self._trava:
+            linhas = []
+            for nome in sorted({nome for nome, _ in self._contadores}):
+                linhas.append(f"# TYPE {nome} counter")
+                for (outro, rotulos), valor in sorted(self._contadores.items()):
+                    if outro == nome:
+                        linhas.append(f"{nome}{_rotulos_prometheus(rotulos)} {valor}")
+            for nome in sorted({nome for nome, _ in self._histogramas}):
+                linhas.append(f"# TYPE {nome} histogram")
+                for (outro, rotulos), histograma in sorted(self._histogramas.items(), key=lambda item: item[0]):
+                    if outro != nome:
+                        continue
+                    dados = histograma.instantaneo()
+                    for limite, acumulado in dados["baldes"].items():
+                        linhas.append(f"{nome}_bucket{_rotulos_prometheus(rotulos + (('le', limite),))} {acumulado}")
+                    linhas.append(f"{nome}_sum{_rotulos_prometheus(rotulos)} {dados['soma']}")
+                    linhas.append(f"{nome}_count{_rotulos_prometheus(rotulos)} {dados['contagem']}")
+            return "\n".join(linhas) + "\n"
+
+
+def _texto_rotulos(rotulos):
+    return ",".join(f"{chave}={valor}" for chave, valor in rotulos)
+
+def _rotulos_prometheus(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in rotulos) + "}"
+
+
+# E/S dos DAOs da operação em andamento na thread atual (ver medir_io)
+_io_da_thread = threading.local()
+
+def registrar_io(bytes_lidos=0, bytes_escritos=0, carregamentos=0, segundos=0.0):
+    """Chamado pelos DAOs a cada leitura/gravação; só contabiliza dentro de medir_io()"""
+    contadores = getattr(_io_da_thread, "contadores", None)
+    if contadores is not None:
+        contadores["bytes_lidos"] += bytes_lidos
+        contadores["bytes_escritos"] += bytes_escritos
+        contadores["carregamentos"] += carregamentos
+        contadores["segundos"] += segundos
+
+@contextmanager
+def medir_io():
+    """Acumula, no dict retornado, a E/S de DAO feita pela thread atual dentro do contexto"""
+    anteriores = getattr(_io_da_thread, "contadores", None)
+    contadores = {"bytes_lidos": 0, "bytes_escritos": 0, "carregamentos": 0, "segundos": 0.0}
+    _io_da_thread.contadores = contadores
+    try:
+        yield contadores
+    finally:
+        _io_da_thread.contadores = anteriores
+        # Operações aninhadas também contam para a externa
+        if anteriores is not None:
+            for chave, valor in contadores.items():
+                anteriores[chave] += valor
\ No newline at end of file
@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ALGORITMO = "pbkdf2_sha256"
+# Custo padrão do PBKDF2; aumentar conforme o hardware permitir
+ITERACOES = 200000
+TAMANHO_SAL = 16
+
+def gerar_hash(senha, iteracoes=ITERACOES):
+    """Hash com sal aleatório no formato 'pbkdf2_sha256$iterações$sal$hash' (sal e hash em hexadecimal)"""
+    sal = os.urandom(TAMANHO_SAL)
+    derivada = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, iteracoes)
+    return f"{ALGORITMO}${iteracoes}${sal.hex()}${derivada.hex()}"
+
+def eh_hash(valor):
+    return isinstance(valor, str) and valor.startswith(ALGORITMO + "$")
+
+def verificar(senha, armazenada):
+    """Confere a senha com o valor armazenado; registros antigos guardam a senha em texto puro"""
+    if not eh_hash(armazenada):
+        return hmac.compare_digest(senha.encode("utf-8"), str(armazenada).encode("utf-8"))
+    _, iteracoes, sal, derivada = armazenada.split("$")
+    calculada = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), bytes.fromhex(sal), int(iteracoes))
+    return hmac.compare_digest(calculada, bytes.fromhex(derivada))
+
+def precisa_atualizar(armazenada, iteracoes=ITERACOES):
+    """Indica se o valor armazenado deve ser refeito: texto puro ou custo menor que o atual"""
+    return not eh_hash(armazenada) or int(armazenada.split("$")[1]) < iteracoes
+
+
+class CacheVerificacoes:
+    """Credenciais verificadas recentemente, para que logins repetidos não paguem o custo do hash.
+
+    Guarda por login só uma impressão HMAC da senha (com chave aleatória do
+    processo, nunca a senha) e o hash armazenado no momento da verificação:
+    se a senha do usuário mudar, a entrada deixa de valer. As entradas expiram
+    após `validade` segundos e as menos usadas saem quando passa de `capacidade`.
+    """
+
+    def __init__(self, capacidade=1024, validade=300):
+        self._capacidade = capacidade
+        self._validade = validade
+        self._chave = os.urandom(32)
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _impressao(self, senha):
+        return hmac.new(self._chave, senha.encode("utf-8"), hashlib.sha256).digest()
+
+    def confere(self, login, senha, armazenada):
+        with self._trava:
+            entrada = self._entradas.get(login)
+            if entrada is None:
+                return False
+            impressao, hash_verificado, expira = entrada
+            if expira < time.monotonic() or hash_verificado != armazenada:
+                del self._entradas[login]
+                return False
+            self._entradas.move_to_end(login)
+        return hmac.compare_digest(impressao, self._impressao(senha))
+
+    def registrar(self, login, senha, armazenada):
+        entrada = (self._impressao(senha), armazenada, time.monotonic() + self._validade)
+        with self._trava:
+            self._entradas[login] = entrada
+            self._entradas.move_to_end(login)
+            while len(self._entradas) > self._capacidade:
+                self._entradas.popitem(last=False)
+
+    def remover(self, login):
+        with self._trava:
+            self._entradas.pop(login, None)
\ No newline at end of file
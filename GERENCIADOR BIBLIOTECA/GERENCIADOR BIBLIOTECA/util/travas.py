@@ -0,0 +1,24 @@
+import threading
+from contextlib import contextmanager
+
+class TravasPorChave:
+    """Travas por chave distribuídas em faixas (lock striping).
+
+    Operações sobre chaves diferentes quase sempre caem em faixas diferentes e
+    rodam em paralelo; a memória usada é fixa, independente do número de chaves.
+    """
+    
+    def __init__(self, faixas=64):
+        self._travas = [threading.RLock() for _ in range(faixas)]
+    
+    @contextmanager
+    def travar(self, *chaves):
+        # As faixas são sempre adquiridas em ordem crescente, o que evita deadlock
+        indices = sorted({hash(chave) % len(self._travas) for chave in chaves})
+        for indice in indices:
+            self._travas[indice].acquire()
+        try:
+            yield
+        finally:
+            for indice in reversed(indices):
+                self._travas[indice].release()
\ No newline at end of file